@@ -54,6 +54,7 @@ setup(
         'requests>=2.25',
         'python-dateutil>=2.8',
         'tincan>=0.6',  # или другая xAPI-библиотека
+        'numpy>=1.24',
     ],
     license="Apache Software License 2.0",
     zip_safe=False,
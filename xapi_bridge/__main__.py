@@ -14,18 +14,20 @@ import sys
 import threading
 import time
 
+from collections import deque
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 from types import FrameType
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from pyinotify import WatchManager, Notifier, NotifierError, EventsCodes, ProcessEvent
-from tincan import StatementList
 
-from xapi_bridge import client, converter, exceptions, settings
+from xapi_bridge import client, converter, exceptions, lms_api, lms_prefetch, settings
+from xapi_bridge.batching import AdaptiveBatchTuner, WeightedFairGate
 from xapi_bridge.constants import OPENEDX_OAUTH2_TOKEN_URL
 from xapi_bridge.historical_processor import process_historical_logs
+from xapi_bridge.video_sessions import VideoSessionAggregator
 
 if settings.HTTP_PUBLISH_STATUS:
     from xapi_bridge.server import httpd
@@ -35,74 +37,348 @@ logger = logging.getLogger('edX-xapi-bridge main')
 
 
 class QueueManager:
-    """Управление очередью и пакетной отправкой xAPI-высказываний."""
-
-    def __init__(self):
-        self.cache: list = []
+    """Управление очередью и пакетной отправкой xAPI-высказываний в одну цель публикации."""
+
+    # Пауза перед повторной выгрузкой спула после ошибки подключения к LRS (сек)
+    SPOOL_RETRY_INTERVAL = 5
+
+    def __init__(self, lane: str = converter.DEFAULT_PUBLISH_LANE, max_payload: Optional[int] = None,
+                 max_wait_time: Optional[float] = None, weight: float = 1,
+                 gate: Optional[WeightedFairGate] = None, target: str = client.DEFAULT_LRS_TARGET):
+        """
+        Args:
+            lane: Имя линии публикации
+            max_payload: Размер пакета линии (по умолчанию PUBLISH_MAX_PAYLOAD)
+            max_wait_time: Время ожидания пакета линии (по умолчанию PUBLISH_MAX_WAIT_TIME)
+            weight: Доля линии в пропускной способности отправки
+            gate: Общий для всех линий цели планировщик отправки
+            target: Имя цели публикации (LRS)
+        """
+        self.lane = lane
+        self.target = target
+        self.publisher = client.lrs_publishers[target]
+        self.lane_max_payload = max_payload or settings.PUBLISH_MAX_PAYLOAD
+        self.lane_max_wait_time = settings.PUBLISH_MAX_WAIT_TIME if max_wait_time is None else max_wait_time
+        self.weight = weight
+        self.gate = gate or WeightedFairGate()
+        self.cache: Deque[bytes] = deque()
+        self.cache_bytes = 0  # Размер JSON-тела накопленного пакета
+        self.oldest_queued_at: Optional[float] = None  # Время постановки в очередь самого старого высказывания
         self.cache_lock = threading.Lock()
-        self.publish_timer: Optional[threading.Timer] = None
         self.publish_retries = 0
         self.total_published = 0
+        self.tuner = (
+            AdaptiveBatchTuner(self.lane_max_payload, self.lane_max_wait_time)
+            if getattr(settings, 'PUBLISH_ADAPTIVE', False) else None
+        )
+
+        # Готовые пакеты, ожидающие отправки потоком цели
+        self.pending: Deque[List[bytes]] = deque()
+        self.pending_count = 0
+        self.max_pending = getattr(settings, 'PUBLISH_SPOOL_MAX_PENDING', 10000)
+        spool_dir = getattr(settings, 'PUBLISH_SPOOL_DIR', None)
+        self.spool_path = os.path.join(spool_dir, f'{target}-{lane}.jsonl') if spool_dir else None
+        self.spool_lock = threading.Lock()
+        self.spool_retry_at: Optional[float] = None  # Момент повторной выгрузки спула после ошибки
+
+        # Единственный поток, отправляющий пакеты цели, чтобы медленная LRS не задерживала чтение лога
+        self.running = True
+        self.wakeup = threading.Event()
+        self.flusher = threading.Thread(
+            target=self._flush_loop, name=f'xapi-bridge-flusher-{target}-{lane}', daemon=True
+        )
+        self.flusher.start()
+
+    def close(self) -> None:
+        """
+        Останавливает поток отправки.
+
+        Вызывается явно при завершении наблюдения (TailHandler.__exit__),
+        а не из __del__: сборщик мусора может вызвать финализатор при
+        остановке интерпретатора или для объекта, чей __init__ не завершился.
+        """
+        self.running = False
+        self.wakeup.set()
+        if self.flusher.is_alive() and self.flusher is not threading.current_thread():
+            self.flusher.join()
+
+    @property
+    def max_payload(self) -> int:
+        """Предел количества высказываний в пакете."""
+        return self.tuner.max_payload_size if self.tuner else self.lane_max_payload
+
+    @property
+    def max_wait_time(self) -> float:
+        """Предел ожидания неполного пакета в секундах."""
+        return self.tuner.max_wait_time_secs if self.tuner else self.lane_max_wait_time
+
+    def observe_tail_lag(self, lag_bytes: int) -> None:
+        """Передает адаптивному режиму объем непрочитанного хвоста лога."""
+        if self.tuner:
+            self.tuner.observe_tail_lag(lag_bytes)
+
+    def push(self, stmt: bytes) -> None:
+        """Добавление сериализованного высказывания в очередь."""
+        max_bytes = getattr(settings, 'PUBLISH_MAX_PAYLOAD_BYTES', 0)
+
+        # Высказывание не помещается в байтовый бюджет пакета - сначала отправляем накопленное
+        if max_bytes and self.cache and self.cache_bytes + len(stmt) + 1 > max_bytes:
+            self._dispatch(self._seal())
+
+        if max_bytes and len(stmt) + 2 > max_bytes:
+            logger.warning(f"Высказывание размером {len(stmt)} байт превышает PUBLISH_MAX_PAYLOAD_BYTES")
 
-    def __del__(self):
-        self.destroy()
-
-    def destroy(self) -> None:
-        """Очистка ресурсов."""
-        if self.publish_timer:
-            self.publish_timer.cancel()
-
-    def push(self, stmt) -> None:
-        """Добавление высказывания в очередь."""
         with self.cache_lock:
             self.cache.append(stmt)
+            # '[' и ']' для первого высказывания, ',' для каждого следующего
+            self.cache_bytes += len(stmt) + (2 if len(self.cache) == 1 else 1)
+            if self.oldest_queued_at is None:
+                self.oldest_queued_at = time.monotonic()
+                self.wakeup.set()
+            full = len(self.cache) >= self.max_payload or (max_bytes and self.cache_bytes >= max_bytes)
 
-        if len(self.cache) == 1 and settings.PUBLISH_MAX_WAIT_TIME > 0:
-            self.publish_timer = threading.Timer(settings.PUBLISH_MAX_WAIT_TIME, self.publish)
-            self.publish_timer.start()
-
-        if len(self.cache) >= settings.PUBLISH_MAX_PAYLOAD:
-            self.publish()
+        if full:
+            self._dispatch(self._seal())
 
     def publish(self) -> None:
-        """Отправка высказываний в LRS."""
+        """Немедленная отправка всех накопленных высказываний в LRS."""
+        self._dispatch(self._seal())
+        while True:
+            batch = self._next_pending()
+            if batch is None:
+                break
+            self._send(batch)
+
+    def _seal(self) -> List[bytes]:
+        """Забирает накопленные высказывания из очереди в виде готового пакета."""
         with self.cache_lock:
-            if not self.cache:
-                return
+            batch = list(self.cache)
+            self.cache.clear()
+            self.cache_bytes = 0
+            self.oldest_queued_at = None
+        return batch
+
+    def _dispatch(self, batch: List[bytes]) -> None:
+        """
+        Передает готовый пакет потоку отправки.
+
+        Если в памяти уже ждут отправки PUBLISH_SPOOL_MAX_PENDING высказываний,
+        пакет откладывается в спул на диске. Без спула пакет все равно ставится
+        в очередь в памяти: вызывающий поток читает лог для всех целей и не
+        должен ждать медленную LRS одной из них.
+        """
+        if not batch:
+            return
+
+        with self.cache_lock:
+            was_overflowing = self.pending_count > self.max_pending
+            overflow = self.pending_count + len(batch) > self.max_pending
+            if not overflow or not self.spool_path:
+                self.pending.append(batch)
+                self.pending_count += len(batch)
+                self._observe_pending()
+
+        if overflow and self.spool_path:
+            self._spill(batch)
+            return
+        if overflow and not was_overflowing:
+            logger.warning(
+                f"Очередь LRS {self.target} (линия {self.lane}) превысила PUBLISH_SPOOL_MAX_PENDING: "
+                f"{self.pending_count} высказываний ждут отправки в памяти"
+            )
+        self.wakeup.set()
 
-            # Проверяем типы объектов в кэше перед созданием StatementList
-            invalid_statements = []
-            for i, stmt in enumerate(self.cache):
-                if not hasattr(stmt, 'as_version') and not hasattr(stmt, 'to_dict') and not hasattr(stmt, '__dict__') and not isinstance(stmt, dict):
-                    invalid_statements.append((i, type(stmt).__name__))
-            
-            if invalid_statements:
-                logger.error(f"Обнаружены невалидные statements в кэше: {invalid_statements}")
-                # Удаляем невалидные statements из кэша
-                valid_cache = [stmt for stmt in self.cache if hasattr(stmt, 'as_version') or hasattr(stmt, 'to_dict') or hasattr(stmt, '__dict__') or isinstance(stmt, dict)]
-                if not valid_cache:
-                    logger.warning("Нет валидных statements в кэше, пропускаем отправку")
-                    self.cache.clear()
-                    return
-                self.cache = valid_cache
-
-            # Создаем StatementList из объектов Statement (преобразование в словари происходит в клиенте)
-            logger.debug(f"Создаем StatementList из {len(self.cache)} высказываний")
+    def _next_pending(self) -> Optional[List[bytes]]:
+        """Забирает следующий готовый пакет из очереди отправки."""
+        with self.cache_lock:
+            if not self.pending:
+                return None
+            batch = self.pending.popleft()
+            self.pending_count -= len(batch)
+            self._observe_pending()
+            return batch
+
+    def _observe_pending(self) -> None:
+        """Передает адаптивному режиму глубину очереди готовых пакетов (вызывается под cache_lock)."""
+        if self.tuner:
+            self.tuner.observe_queue_depth(self.pending_count)
+
+    def _spill(self, batch: List[bytes]) -> None:
+        """Дописывает пакет в спул цели, по одному высказыванию на строку."""
+        with self.spool_lock:
+            with open(self.spool_path, 'ab') as spool:
+                spool.write(b''.join(stmt + b'\n' for stmt in batch))
+        logger.warning(f"{len(batch)} высказываний отложено в спул {self.spool_path}")
+        self.wakeup.set()
+
+    def _drain_spool(self) -> bool:
+        """
+        Отправляет очередной пакет высказываний, отложенных в спул.
+
+        Спул переименовывается перед чтением, поэтому новые пакеты пишутся
+        в свежий файл. Смещение после каждого отправленного пакета сохраняется
+        рядом со спулом, и после перезапуска выгрузка продолжается с него.
+        При ошибке подключения выгрузка откладывается на SPOOL_RETRY_INTERVAL
+        секунд, а высказывания остаются в спуле.
+
+        Returns:
+            True, если пакет из спула отправлен и выгрузку можно продолжать
+        """
+        if not self.spool_path:
+            return False
+        if self.spool_retry_at is not None and time.monotonic() < self.spool_retry_at:
+            return False
+        self.spool_retry_at = None
+
+        draining_path = f'{self.spool_path}.draining'
+        offset_path = f'{draining_path}.offset'
+        with self.spool_lock:
+            if not os.path.exists(draining_path):
+                if not os.path.exists(self.spool_path):
+                    return False
+                os.replace(self.spool_path, draining_path)
+                self._save_spool_offset(offset_path, 0)
+
+        offset = self._load_spool_offset(offset_path)
+        batch, offset = self._read_spool_batch(draining_path, offset)
+        if not batch:
+            os.remove(draining_path)
+            if os.path.exists(offset_path):
+                os.remove(offset_path)
+            return True
+
+        if not self._send(batch, from_spool=True):
+            self.spool_retry_at = time.monotonic() + self.SPOOL_RETRY_INTERVAL
+            logger.warning(f"LRS {self.target} недоступна, выгрузка спула {draining_path} приостановлена")
+            return False
+        self._save_spool_offset(offset_path, offset)
+        return True
+
+    def _read_spool_batch(self, path: str, offset: int) -> Tuple[List[bytes], int]:
+        """
+        Читает из спула пакет высказываний, начиная со смещения offset.
+
+        Returns:
+            Пакет и смещение сразу после него
+        """
+        max_bytes = getattr(settings, 'PUBLISH_MAX_PAYLOAD_BYTES', 0)
+        batch: List[bytes] = []
+        batch_bytes = 0
+        with open(path, 'rb') as spool:
+            spool.seek(offset)
+            while len(batch) < self.max_payload:
+                line = spool.readline()
+                if not line:
+                    break
+                payload = line.rstrip(b'\n')
+                if not payload.strip():
+                    offset = spool.tell()
+                    continue
+                if batch and max_bytes and batch_bytes + len(payload) + 1 > max_bytes:
+                    break
+                batch.append(payload)
+                batch_bytes += len(payload) + (2 if len(batch) == 1 else 1)
+                offset = spool.tell()
+        return batch, offset
+
+    @staticmethod
+    def _load_spool_offset(path: str) -> int:
+        """Смещение выгрузки спула (0, если оно не сохранено)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            logger.warning(f"Некорректное смещение выгрузки спула в {path}, выгрузка начнется сначала")
+            return 0
+
+    @staticmethod
+    def _save_spool_offset(path: str, offset: int) -> None:
+        """Атомарная запись смещения выгрузки спула."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, path)
+
+    def _flush_deadline(self) -> Optional[float]:
+        """Момент (по time.monotonic), когда неполный пакет должен быть отправлен."""
+        oldest_queued_at = self.oldest_queued_at
+        if oldest_queued_at is None or self.lane_max_wait_time <= 0:
+            return None
+        return oldest_queued_at + self.max_wait_time
+
+    def _flush_loop(self) -> None:
+        """Отправляет готовые пакеты, спул и неполный пакет по истечении срока ожидания."""
+        while self.running:
+            self.wakeup.clear()
             try:
-                statements = StatementList(self.cache)
-            except Exception as e:
-                logger.error(f"Ошибка при создании StatementList: {e}")
-                logger.error(f"Типы объектов в кэше: {[type(stmt).__name__ for stmt in self.cache]}")
-                raise
+                batch = self._next_pending()
+                if batch is not None:
+                    self._send(batch)
+                    continue
+                if self._drain_spool():
+                    continue
+
+                deadline = self._flush_deadline()
+                # Поток просыпается к сроку неполного пакета или к повторной выгрузке спула
+                wake_times = [t for t in (deadline, self.spool_retry_at) if t is not None]
+                if not wake_times:
+                    self.wakeup.wait()
+                    continue
+
+                delay = min(wake_times) - time.monotonic()
+                if delay > 0:
+                    self.wakeup.wait(delay)
+                    continue
 
+                if deadline is not None and deadline <= time.monotonic():
+                    self._send(self._seal())
+            except exceptions.XAPIBridgeCriticalError as e:
+                e.terminate()
+            except OSError as e:
+                logger.error(f"Ошибка работы со спулом {self.spool_path}: {e}")
+                self.wakeup.wait(1)
+
+    def _send(self, statements: List[bytes], from_spool: bool = False) -> bool:
+        """
+        Отправка пакета в LRS с повторными попытками.
+
+        Args:
+            statements: Пакет сериализованных высказываний
+            from_spool: Пакет прочитан из спула: при ошибке подключения он
+                не повторяется и не откладывается повторно, а остается в спуле
+
+        Returns:
+            False, если пакет из спула не отправлен из-за ошибки подключения
+        """
+        if not statements:
+            return True
+
+        # Пакеты уже сериализованы, повторная отправка их не перекодирует
+        with self.gate.slot(self.lane, self.weight, len(statements)):
             while statements:
                 try:
-                    client.lrs_publisher.publish_statements(statements)
+                    started = time.monotonic()
+                    self.publisher.publish_statements(statements)
+                    if self.tuner:
+                        self.tuner.observe_publish_latency(time.monotonic() - started)
+                    self.publish_retries = 0
                     self.total_published += len(statements)
-                    logger.info(f"Отправлено {self.total_published} высказываний")
+                    logger.info(
+                        f"Отправлено {self.total_published} высказываний (LRS {self.target}, линия {self.lane})"
+                    )
                     self._check_benchmark()
                     break
                 except exceptions.XAPIBridgeLRSConnectionError as e:
+                    if from_spool:
+                        return False
+                    if self.spool_path and self.publish_retries >= settings.PUBLISH_MAX_RETRIES:
+                        # Цель со спулом не останавливает бридж: пакет ждет восстановления LRS на диске
+                        self.publish_retries = 0
+                        self._spill(statements)
+                        time.sleep(1)
+                        break
                     self._handle_connection_error(e, statements)
                 except exceptions.XAPIBridgeStatementError as e:
                     self._handle_storage_error(e, statements)
@@ -110,11 +386,9 @@ class QueueManager:
                     # Обработка всех остальных непредвиденных ошибок
                     logger.error(f"Произошла непредвиденная ошибка во время публикации высказываний: {e}")
                     for statement in statements:
-                        logger.error(f"Неотправленное высказывание: {statement}")
-
-            self.cache.clear()
-            if self.publish_timer:
-                self.publish_timer.cancel()
+                        logger.error(f"Неотправленное высказывание: {statement.decode('utf-8')}")
+                    break
+        return True
 
     def _check_benchmark(self) -> None:
         """Проверка достижения тестового показателя."""
@@ -122,19 +396,59 @@ class QueueManager:
             if self.total_published >= settings.TEST_LOAD_SUCCESSFUL_STATEMENTS_BENCHMARK:
                 logger.info(f"Достигнут показатель: {self.total_published} высказываний")
 
-    def _handle_connection_error(self, e: exceptions.XAPIBridgeLRSConnectionError, statements: StatementList) -> None:
+    def _handle_connection_error(self, e: exceptions.XAPIBridgeLRSConnectionError, statements: List[bytes]) -> None:
         """Обработка ошибок соединения."""
         if self.publish_retries >= settings.PUBLISH_MAX_RETRIES:
             e.err_fail()
         self.publish_retries += 1
         time.sleep(1)
 
-    def _handle_storage_error(self, e: exceptions.XAPIBridgeStatementError, statements: StatementList) -> None:
+    def _handle_storage_error(self, e: exceptions.XAPIBridgeStatementError, statements: List[bytes]) -> None:
         """Обработка ошибок хранения."""
         logger.warning(f"Ошибка хранения: {e.message}")
         # Удаляем проблемное высказывание из списка
         if e.statement in statements:
             statements.remove(e.statement)
+        elif len(statements) == 1:
+            logger.error(f"Высказывание отклонено LRS: {statements[0].decode('utf-8')}")
+            statements.clear()
+        else:
+            # LRS не сообщила, какое высказывание некорректно: делим пакет пополам,
+            # вторая половина отправляется следующим пакетом
+            half = len(statements) // 2
+            with self.cache_lock:
+                self.pending.appendleft(statements[half:])
+                self.pending_count += len(statements) - half
+                self._observe_pending()
+            del statements[half:]
+            self.wakeup.set()
+
+
+def create_publish_lanes(target: str = client.DEFAULT_LRS_TARGET) -> Dict[str, QueueManager]:
+    """
+    Создает очереди цели публикации для линий из настройки PUBLISH_LANES.
+
+    Все линии цели делят один планировщик отправки, линия по умолчанию
+    создается всегда.
+    """
+    gate = WeightedFairGate()
+    lanes = {
+        lane: QueueManager(lane=lane, gate=gate, target=target, **config)
+        for lane, config in (getattr(settings, 'PUBLISH_LANES', None) or {}).items()
+    }
+    if converter.DEFAULT_PUBLISH_LANE not in lanes:
+        lanes[converter.DEFAULT_PUBLISH_LANE] = QueueManager(gate=gate, target=target)
+    return lanes
+
+
+def create_publish_queues() -> Dict[str, Dict[str, QueueManager]]:
+    """
+    Создает очереди всех целей публикации.
+
+    У каждой цели свои пакеты, повторные попытки, спул и поток отправки,
+    поэтому медленная LRS не задерживает остальные.
+    """
+    return {target: create_publish_lanes(target) for target in client.lrs_publishers}
 
 
 class NotifierLostINodeException(NotifierError):
@@ -149,19 +463,56 @@ class TailHandler(ProcessEvent):
     def __init__(self, filename: str, **kwargs):
         super().__init__(**kwargs)
         self.filename = filename
-        self.ifp = open(filename, 'r', 1)
+        # Двоичный режим: tell() возвращает смещение в байтах для оценки отставания от лога
+        self.ifp = open(filename, 'rb')
         self.ifp.seek(0, 2)
-        self.publish_queue = QueueManager()
-        self.race_buffer = ''
+        self.publish_queues = create_publish_queues()
+        self.video_sessions = (
+            VideoSessionAggregator() if getattr(settings, 'VIDEO_SESSION_AGGREGATION', False) else None
+        )
+        self.race_buffer = b''
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.publish_queue.publish()
-        self.publish_queue.destroy()
+        if self.video_sessions:
+            self.enqueue_video_sessions(self.video_sessions.flush_all())
+        for queue in self.all_queues():
+            queue.publish()
+            queue.close()
         self.ifp.close()
 
+    def all_queues(self) -> List[QueueManager]:
+        """Очереди всех линий всех целей публикации."""
+        return [queue for lanes in self.publish_queues.values() for queue in lanes.values()]
+
+    def get_publish_queues(self, event: Dict) -> List[QueueManager]:
+        """Очереди линии события в целях публикации, которым оно маршрутизировано."""
+        lane = converter.get_publish_lane(event)
+        queues = []
+        for target in client.get_event_targets(event):
+            lanes = self.publish_queues[target]
+            queues.append(lanes.get(lane) or lanes[converter.DEFAULT_PUBLISH_LANE])
+        return queues
+
+    def enqueue(self, event: Dict, statements) -> None:
+        """Сериализует высказывания события один раз и ставит их в очереди его целей."""
+        payloads = converter.serialize_statements(statements)
+        for queue in self.get_publish_queues(event):
+            for payload in payloads:
+                queue.push(payload)
+
+    def enqueue_video_sessions(self, session_statements) -> None:
+        """Ставит в очередь итоговые высказывания сессий просмотра по их событиям."""
+        for event, statement in session_statements:
+            self.enqueue(event, (statement,))
+
+    def flush_video_sessions(self, notifier: Optional[Notifier] = None) -> None:
+        """Отправляет сессии просмотра видео, простаивающие дольше VIDEO_SESSION_IDLE_TIMEOUT."""
+        if self.video_sessions:
+            self.enqueue_video_sessions(self.video_sessions.flush_idle())
+
     def check_NOT_DAMAGED(self, event) -> Any:
         """ Проверка на целостность полученного события
         в логе события от Оценки просмотренного события
@@ -177,33 +528,56 @@ class TailHandler(ProcessEvent):
                 event = event + '}'
         return event
 
+    def observe_tail_lag(self) -> None:
+        """Передает очередям объем непрочитанного хвоста лога в байтах."""
+        lag = os.fstat(self.ifp.fileno()).st_size - self.ifp.tell()
+        for queue in self.all_queues():
+            queue.observe_tail_lag(lag)
+
     def process_IN_MODIFY(self, event) -> None:
         """Обработка изменений файла."""
+        # Объем непрочитанного хвоста лога - сигнал отставания для адаптивного режима
+        self.observe_tail_lag()
         buff = self.race_buffer + self.ifp.read()
 
-        if buff and buff[-1] != '\n':
+        if buff and not buff.endswith(b'\n'):
             self.race_buffer = buff
+            self.observe_tail_lag()
             return
 
-        self.race_buffer = ''
-        for line in buff.split('\n'):
+        self.race_buffer = b''
+        events = []
+        # Порция заканчивается переводом строки, поэтому многобайтовые символы не разрезаны
+        for line in buff.decode('utf-8', errors='replace').split('\n'):
             if not line:
                 continue
             try:
                 line = self.check_NOT_DAMAGED(line)
-                event = json.loads(line)
+                events.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Ошибка json-конвертации события: {e}. \nСтрока {line}")
+
+        # Данные пользователей и курсов порции запрашиваются пакетами в пуле предвыборки;
+        # конвертация ждет их не дольше LMS_API_PREFETCH_WAIT, чтобы не дублировать запросы
+        lms_prefetch.prefetch(events, timeout=getattr(settings, 'LMS_API_PREFETCH_WAIT', 2.0))
+
+        for event in events:
+            try:
+                if self.video_sessions and self.video_sessions.accepts(event):
+                    self.enqueue_video_sessions(self.video_sessions.add(event))
+                    continue
                 statements = converter.to_xapi(event)
                 if statements:
-                    for stmt in statements:
-                        self.publish_queue.push(stmt)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Ошибка json-конвертации события: {e}. \nСтрока {line} \nСобытие {event}")
+                    self.enqueue(event, statements)
             except Exception as e:
                 raise exceptions.XAPIBridgeSkippedConversion(
                     event_type=event['event_type'],
                     reason=f"Ошибка обработки события: {e}"
                 ) from e
 
+        # Хвост прочитан: отставание снова измеряется, чтобы адаптивный режим не держал прежнее давление
+        self.observe_tail_lag()
+
     def process_IN_MOVE_SELF(self, event) -> None:
         logger.info("Файл перемещен")
         raise NotifierLostINodeException("IN_MOVE_SELF")
@@ -224,7 +598,8 @@ def watch(file_path: str) -> None:
                 read_freq=settings.NOTIFIER_READ_FREQ,
                 timeout=settings.NOTIFIER_POLL_TIMEOUT)
             wm.add_watch(file_path, TailHandler.MASK)
-            notifier.loop()
+            # Колбэк цикла вызывается и при отсутствии изменений файла
+            notifier.loop(callback=handler.flush_video_sessions)
     except NotifierLostINodeException:
         logger.info("Перезапуск наблюдения...")
         watch(file_path)
@@ -395,6 +770,9 @@ def main():
     args = parse_args()
     setup_logging()
 
+    # Каталог курсов загружается в фоне; до загрузки курсы запрашиваются через API записей на курсы
+    lms_api.get_course_catalog()
+
     if args.historical_logs_dir:
         process_gzipped_logs(args.historical_logs_dir, args.historical_logs_dates)
         return
@@ -0,0 +1,140 @@
+"""
+Адаптивная настройка пакетов и распределение отправки в LRS между линиями публикации.
+
+"""
+
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from xapi_bridge import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatchTuner:
+    """
+    Подбирает размер пакета и интервал отправки в заданных границах.
+
+    Когда бридж успевает за логом, пакеты маленькие и уходят быстро.
+    При отставании (большой непрочитанный хвост лога, глубокая очередь
+    или медленный LRS) пакеты растут до PUBLISH_MAX_PAYLOAD, чтобы
+    разобрать отставание за меньшее число запросов.
+    """
+
+    # Коэффициент сглаживания для средней задержки отправки
+    LATENCY_SMOOTHING = 0.3
+
+    def __init__(self, max_payload: Optional[int] = None, max_wait_time: Optional[float] = None):
+        """
+        Args:
+            max_payload: Верхняя граница размера пакета (по умолчанию PUBLISH_MAX_PAYLOAD)
+            max_wait_time: Верхняя граница интервала отправки (по умолчанию PUBLISH_MAX_WAIT_TIME)
+        """
+        self.max_payload = max_payload or settings.PUBLISH_MAX_PAYLOAD
+        self.max_wait_time = settings.PUBLISH_MAX_WAIT_TIME if max_wait_time is None else max_wait_time
+        self.min_payload = max(1, min(getattr(settings, 'PUBLISH_MIN_PAYLOAD', 10), self.max_payload))
+        self.min_wait_time = min(getattr(settings, 'PUBLISH_MIN_WAIT_TIME', 1), self.max_wait_time)
+        self.lag_threshold = getattr(settings, 'PUBLISH_ADAPTIVE_LAG_BYTES', 1000000)
+        self.latency_threshold = getattr(settings, 'PUBLISH_ADAPTIVE_LATENCY', 2.0)
+
+        self.tail_lag = 0
+        self.queue_depth = 0
+        self.publish_latency = 0.0
+        self.lock = threading.Lock()
+
+    def observe_tail_lag(self, lag_bytes: int) -> None:
+        """Фиксирует объем непрочитанного хвоста лога в байтах."""
+        self.tail_lag = max(0, lag_bytes)
+
+    def observe_queue_depth(self, depth: int) -> None:
+        """
+        Фиксирует количество высказываний в готовых пакетах, ожидающих отправки.
+
+        Заполняемый пакет не учитывается: иначе он сам поднимал бы давление,
+        и каждый пакет закрывался бы на верхней границе размера.
+        """
+        self.queue_depth = depth
+
+    def observe_publish_latency(self, seconds: float) -> None:
+        """Учитывает длительность очередного запроса к LRS."""
+        with self.lock:
+            if not self.publish_latency:
+                self.publish_latency = seconds
+            else:
+                self.publish_latency += self.LATENCY_SMOOTHING * (seconds - self.publish_latency)
+
+    @property
+    def pressure(self) -> float:
+        """Степень отставания от 0 (успеваем) до 1 (сильно отстаем)."""
+        signals = [self.queue_depth / self.max_payload]
+        if self.lag_threshold > 0:
+            signals.append(self.tail_lag / self.lag_threshold)
+        if self.latency_threshold > 0:
+            signals.append(self.publish_latency / self.latency_threshold)
+        return min(1.0, max(signals))
+
+    @property
+    def max_payload_size(self) -> int:
+        """Текущий предел количества высказываний в пакете."""
+        return round(self.min_payload + (self.max_payload - self.min_payload) * self.pressure)
+
+    @property
+    def max_wait_time_secs(self) -> float:
+        """Текущий интервал отправки неполного пакета."""
+        return self.min_wait_time + (self.max_wait_time - self.min_wait_time) * self.pressure
+
+
+class WeightedFairGate:
+    """
+    Делит пропускную способность отправки в LRS между линиями публикации.
+
+    Пакеты ожидающих линий пропускаются в порядке виртуального времени
+    завершения (weighted fair queuing): линия с весом 4 получает вчетверо
+    больше высказываний, чем линия с весом 1, пока обе заняты, а
+    простаивавшая линия не копит кредит и не захватывает канал.
+    """
+
+    def __init__(self, capacity: int = 1):
+        """
+        Args:
+            capacity: Количество одновременно выполняемых запросов к LRS
+        """
+        self.capacity = capacity
+        self.active = 0
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[str, float] = {}
+        self.waiting: Set[Tuple[float, int]] = set()
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def slot(self, lane: str, weight: float, cost: int) -> Iterator[None]:
+        """
+        Ожидает своей очереди на отправку пакета.
+
+        Args:
+            lane: Имя линии публикации
+            weight: Вес линии
+            cost: Стоимость пакета (количество высказываний)
+        """
+        with self.condition:
+            start = max(self.virtual_time, self.finish_tags.get(lane, 0.0))
+            finish = start + cost / max(weight, 1e-6)
+            self.finish_tags[lane] = finish
+            ticket = (finish, next(self.sequence))
+            self.waiting.add(ticket)
+            self.condition.wait_for(lambda: self.active < self.capacity and min(self.waiting) == ticket)
+            self.waiting.remove(ticket)
+            self.active += 1
+            self.virtual_time = max(self.virtual_time, start)
+
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
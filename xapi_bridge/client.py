@@ -3,52 +3,341 @@
 
 """
 
-import importlib
+import functools
+import gzip
+import http.client
 import json
 import logging
+import re
 import socket
-from typing import Any, Dict, Optional
-
-from tincan import RemoteLRS, StatementList
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlparse
+
+from tincan import RemoteLRS
+from tincan.http_request import HTTPRequest
 from tincan.lrs_response import LRSResponse
 
 import xapi_bridge.exceptions as exceptions
 from xapi_bridge import settings
-from xapi_bridge.lrs_backends.learninglocker import LRSBackend
+from xapi_bridge.lrs_backends import load_backend
+from xapi_bridge.lrs_backends.base import (
+    RESPONSE_ERROR, RESPONSE_OK, RESPONSE_SERVER_ERROR, RESPONSE_STORAGE_ERROR, RESPONSE_UNAUTHORISED
+)
 
 
 logger = logging.getLogger(__name__)
 
 
-class XAPIBridgeLRSPublisher:
-    """Обертка для отправки xAPI-высказываний в LRS."""
+class RawHTTPRequest(HTTPRequest):
+    """HTTP-запрос к LRS, тело которого передается как есть (bytes)."""
 
-    def __init__(self):
-        self.lrs = self._configure_lrs()
-        self.backend = LRSBackend()
+    @property
+    def content(self) -> Optional[bytes]:
+        return self._content
 
-    def _configure_lrs(self) -> RemoteLRS:
-        """Конфигурация подключения к LRS."""
-        config = {
+    @content.setter
+    def content(self, value: Optional[bytes]) -> None:
+        self._content = value
+
+
+class TimeoutRemoteLRS(RemoteLRS):
+    """
+    Подключение к LRS с ограничением времени установки соединения и ожидания ответа.
+
+    tincan открывает HTTPConnection без таймаута, и зависшая LRS навсегда
+    останавливает поток отправки. Запрос выполняется так же, как в
+    RemoteLRS._send_request, но сокет получает таймауты.
+    """
+
+    _props = RemoteLRS._props + ['connect_timeout', 'read_timeout']
+
+    def _send_request(self, request: HTTPRequest) -> LRSResponse:
+        headers = {'X-Experience-API-Version': self.version}
+        if self.auth is not None:
+            headers['Authorization'] = self.auth
+        headers.update(request.headers)
+
+        url = request.resource if request.resource.startswith('http') else self.endpoint + request.resource
+        parsed = urlparse(url)
+        path = parsed.path
+        params = urlencode({k: str(v).encode('utf-8') for k, v in request.query_params.items()})
+        query = '&'.join(part for part in (parsed.query, params) if part)
+        if query:
+            path += f'?{query}'
+
+        connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(parsed.hostname, parsed.port, timeout=self.connect_timeout)
+        try:
+            connection.connect()
+            # Таймаут ожидания ответа действует на каждое чтение из сокета
+            connection.sock.settimeout(self.read_timeout)
+            connection.request(method=request.method, url=path, body=request.content, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+
+        success = 200 <= response.status < 300 or (response.status == 404 and getattr(request, 'ignore404', False))
+        return LRSResponse(success=success, request=request, response=response, data=data)
+
+
+# Цель публикации, заданная настройками LRS_ENDPOINT, LRS_USERNAME, LRS_PASSWORD и LRS_BASICAUTH_HASH
+DEFAULT_LRS_TARGET = 'default'
+
+
+def get_lrs_targets() -> Dict[str, Dict[str, Any]]:
+    """
+    Возвращает параметры подключения ко всем целям публикации.
+
+    Цель по умолчанию строится из настроек LRS_*, дополнительные цели
+    задаются настройкой LRS_TARGETS и получают все высказывания.
+    """
+    targets = {
+        DEFAULT_LRS_TARGET: {
             'endpoint': settings.LRS_ENDPOINT,
+            'username': settings.LRS_USERNAME,
+            'password': settings.LRS_PASSWORD,
+            'basicauth_hash': settings.LRS_BASICAUTH_HASH,
+            'failover': getattr(settings, 'LRS_FAILOVER_ENDPOINTS', None) or [],
         }
+    }
+    targets.update(getattr(settings, 'LRS_TARGETS', None) or {})
+    return targets
+
+
+def get_course_org(course_id: str) -> str:
+    """Организация из идентификатора курса (course-v1:Org+Course+Run или Org/Course/Run)."""
+    key = course_id.split(':', 1)[1] if course_id.startswith('course-v1:') else course_id
+    return re.split(r'[+/]', key, maxsplit=1)[0]
+
+
+@functools.lru_cache(maxsize=4096)
+def get_route_target(course_id: str) -> Optional[str]:
+    """
+    Цель публикации курса по таблице маршрутизации LRS_ROUTES.
+
+    Сначала ищется самый длинный совпадающий префикс идентификатора курса,
+    затем совпадение по организации.
+
+    Returns:
+        Имя цели или None, если курс не маршрутизирован
+    """
+    routes = getattr(settings, 'LRS_ROUTES', None) or {}
+    prefixes = [key for key in routes if course_id.startswith(key)]
+    if prefixes:
+        return routes[max(prefixes, key=len)]
+    return routes.get(get_course_org(course_id))
+
+
+def get_event_targets(evt: Dict) -> Tuple[str, ...]:
+    """
+    Цели публикации, которые должны получить высказывания события.
 
-        if settings.LRS_BASICAUTH_HASH:
-            config['auth'] = f"Basic {settings.LRS_BASICAUTH_HASH}"
-        elif settings.LRS_USERNAME and settings.LRS_PASSWORD:
+    Маршрутизированные события уходят в свою цель вместо цели по умолчанию,
+    остальные - в цель по умолчанию. Цели, упомянутые в LRS_ROUTES, получают
+    только свои события, прочие цели из LRS_TARGETS получают все события.
+    """
+    routed_targets = set((getattr(settings, 'LRS_ROUTES', None) or {}).values())
+    broadcast = tuple(
+        target for target in lrs_publishers
+        if target != DEFAULT_LRS_TARGET and target not in routed_targets
+    )
+
+    course_id = (evt.get('context') or {}).get('course_id')
+    route = get_route_target(course_id) if course_id else None
+    if route in lrs_publishers:
+        return (route,) + broadcast
+    return (DEFAULT_LRS_TARGET,) + broadcast
+
+
+class LRSEndpoint:
+    """Адрес LRS цели публикации и его доступность по результатам запросов и проверок."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Args:
+            config: Параметры подключения (endpoint, username, password, basicauth_hash)
+        """
+        self.config = config
+        self.url = config['endpoint']
+        connect_timeout = getattr(settings, 'LRS_CONNECT_TIMEOUT', 5)
+        self.lrs = self._configure_lrs(connect_timeout, getattr(settings, 'LRS_READ_TIMEOUT', 60))
+        # Проверка дольше LRS_HEALTH_MAX_LATENCY все равно считается неудачной, дольше ее не ждем
+        probe_timeout = getattr(settings, 'LRS_HEALTH_MAX_LATENCY', 5.0) or getattr(settings, 'LRS_READ_TIMEOUT', 60)
+        self.probe_lrs = self._configure_lrs(min(connect_timeout, probe_timeout), probe_timeout)
+        self.healthy = True
+        self.failures = 0  # Подряд неудачных запросов
+        self.successes = 0  # Подряд удачных запросов
+        self.latency: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def _configure_lrs(self, connect_timeout: float, read_timeout: float) -> RemoteLRS:
+        """Конфигурация подключения к LRS с таймаутами подключения и ожидания ответа (сек)."""
+        config = {
+            'endpoint': self.url,
+            'connect_timeout': connect_timeout,
+            'read_timeout': read_timeout,
+        }
+
+        if self.config.get('basicauth_hash'):
+            config['auth'] = f"Basic {self.config['basicauth_hash']}"
+        elif self.config.get('username') and self.config.get('password'):
             config.update({
-                'username': settings.LRS_USERNAME,
-                'password': settings.LRS_PASSWORD
+                'username': self.config['username'],
+                'password': self.config['password']
             })
 
-        return RemoteLRS(**config)
+        return TimeoutRemoteLRS(**config)
 
-    def publish_statements(self, statements: StatementList) -> LRSResponse:
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        """
+        Учитывает результат запроса к LRS.
+
+        Задержка передается только для проверок about: время отправки
+        зависит от размера пакета. Проверка дольше LRS_HEALTH_MAX_LATENCY
+        считается неудачной. Адрес
+        становится недоступным после LRS_HEALTH_THRESHOLD неудач подряд
+        и снова доступным после стольких же удачных запросов.
+        """
+        max_latency = getattr(settings, 'LRS_HEALTH_MAX_LATENCY', 5.0)
+        if latency is not None and max_latency and latency > max_latency:
+            success = False
+        threshold = getattr(settings, 'LRS_HEALTH_THRESHOLD', 2)
+
+        with self.lock:
+            if latency is not None:
+                self.latency = latency
+            if success:
+                self.successes += 1
+                self.failures = 0
+            else:
+                self.failures += 1
+                self.successes = 0
+
+            if self.healthy and self.failures >= threshold:
+                self.healthy = False
+                logger.warning(f"LRS {self.url} недоступна ({self.failures} неудачных запросов подряд)")
+            elif not self.healthy and self.successes >= threshold:
+                self.healthy = True
+                logger.info(f"LRS {self.url} снова доступна")
+
+    def probe(self) -> None:
+        """Проверка доступности LRS запросом about."""
+        started = time.monotonic()
+        try:
+            success = self.probe_lrs.about().success
+        except Exception as e:
+            logger.debug(f"Проверка LRS {self.url} не удалась: {e}")
+            success = False
+        self.record(success, time.monotonic() - started)
+
+
+class XAPIBridgeLRSPublisher:
+    """Обертка для отправки xAPI-высказываний в LRS."""
+
+    def __init__(self, target: str = DEFAULT_LRS_TARGET, config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            target: Имя цели публикации
+            config: Параметры подключения (endpoint, username, password, basicauth_hash),
+                тип бэкенда backend и резервные адреса failover
+        """
+        self.target = target
+        self.config = config if config is not None else get_lrs_targets()[target]
+        self.endpoints = [LRSEndpoint(self.config)] + [
+            LRSEndpoint(failover) for failover in self.config.get('failover') or []
+        ]
+        self.current_endpoint = self.endpoints[0]
+        self.backend = load_backend(self.config.get('backend') or settings.LRS_BACKEND_TYPE)
+        self.content_encoding = self._configure_compression()
+
+        # Резервные адреса требуют постоянной проверки доступности, в том числе основного.
+        # Каждый адрес проверяется своим потоком, чтобы зависший адрес не задерживал проверку остальных.
+        self.health_checkers: List[threading.Thread] = []
+        if len(self.endpoints) > 1:
+            for index, endpoint in enumerate(self.endpoints):
+                checker = threading.Thread(
+                    target=self._health_loop, args=(endpoint,), name=f'xapi-bridge-health-{target}-{index}', daemon=True
+                )
+                checker.start()
+                self.health_checkers.append(checker)
+
+    @property
+    def active_endpoint(self) -> LRSEndpoint:
+        """
+        Первый доступный адрес в порядке приоритета.
+
+        Когда основной адрес восстанавливается, отправка возвращается на него.
+        Если недоступны все адреса, используется основной.
+        """
+        endpoint = next((ep for ep in self.endpoints if ep.healthy), self.endpoints[0])
+        if endpoint is not self.current_endpoint:
+            logger.warning(f"Цель {self.target}: отправка переключена с {self.current_endpoint.url} на {endpoint.url}")
+            self.current_endpoint = endpoint
+        return endpoint
+
+    @property
+    def lrs(self) -> RemoteLRS:
+        """Подключение к активному адресу LRS."""
+        return self.active_endpoint.lrs
+
+    @property
+    def endpoint(self) -> str:
+        """URL активного адреса LRS."""
+        return self.active_endpoint.url
+
+    def _health_loop(self, endpoint: LRSEndpoint) -> None:
+        """Периодическая проверка адреса цели."""
+        interval = getattr(settings, 'LRS_HEALTH_CHECK_INTERVAL', 10)
+        while True:
+            endpoint.probe()
+            time.sleep(interval)
+
+    def _configure_compression(self) -> Optional[str]:
+        """Выбор Content-Encoding для тел запросов с учетом возможностей бэкенда."""
+        encoding = getattr(settings, 'LRS_REQUEST_COMPRESSION', None)
+        if not encoding:
+            return None
+
+        encoding = encoding.lower()
+        if encoding not in ('gzip', 'deflate'):
+            logger.warning(f"Неизвестный тип сжатия запросов к LRS: {encoding}, сжатие отключено")
+            return None
+        if encoding not in self.backend.supported_content_encodings:
+            logger.warning(
+                f"Бэкенд {type(self.backend).__module__} не поддерживает Content-Encoding {encoding}, "
+                "сжатие отключено"
+            )
+            return None
+        return encoding
+
+    def _encode_body(self, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+        """Сжатие тела запроса, если оно включено и тело достаточно большое."""
+        headers = {'Content-Type': 'application/json'}
+        if not self.content_encoding:
+            return body, headers
+        if len(body) < getattr(settings, 'LRS_REQUEST_COMPRESSION_MIN_SIZE', 1024):
+            return body, headers
+
+        level = getattr(settings, 'LRS_REQUEST_COMPRESSION_LEVEL', 6)
+        if self.content_encoding == 'gzip':
+            encoded = gzip.compress(body, compresslevel=level)
+        else:
+            encoded = zlib.compress(body, level)
+
+        headers['Content-Encoding'] = self.content_encoding
+        logger.debug(f"Тело запроса сжато ({self.content_encoding}): {len(body)} -> {len(encoded)} байт")
+        return encoded, headers
+
+    def publish_statements(self, statements: Sequence[bytes]) -> LRSResponse:
         """
         Отправка пакета высказываний в LRS.
 
         Args:
-            statements: Список xAPI-высказываний
+            statements: Высказывания, заранее сериализованные в JSON (bytes)
 
         Returns:
             LRSResponse: Ответ от LRS
@@ -57,126 +346,97 @@ class XAPIBridgeLRSPublisher:
             XAPIBridgeLRSConnectionError: Ошибка подключения
             XAPIBridgeStatementError: Ошибка сохранения
         """
+        endpoint = self.active_endpoint
         try:
-            logger.debug(f"Отправляем {len(statements)} высказываний в LRS")
-            logger.debug(f"Тип statements: {type(statements)}")
-
-            # Преобразуем StatementList в список словарей для корректной сериализации
-            statement_dicts = []
-            for i, stmt in enumerate(statements):
-                try:
-                    # Проверяем, что объект является Statement или имеет необходимые методы
-                    if hasattr(stmt, 'as_version'):
-                        statement_dicts.append(stmt.as_version('1.0.3'))
-                    elif hasattr(stmt, 'to_dict'):
-                        statement_dicts.append(stmt.to_dict())
-                    elif hasattr(stmt, '__dict__'):
-                        statement_dicts.append(stmt.__dict__)
-                    elif isinstance(stmt, dict):
-                        # Если это уже словарь, используем его напрямую
-                        statement_dicts.append(stmt)
-                    else:
-                        logger.error(f"Не удалось сериализовать Statement[{i}]: {type(stmt)} - объект не имеет необходимых методов")
-                        continue
-                except Exception as e:
-                    logger.warning(f"Ошибка при преобразовании Statement[{i}] в словарь: {e}")
-                    # Попробуем альтернативный способ сериализации
-                    try:
-                        if hasattr(stmt, 'to_dict'):
-                            statement_dicts.append(stmt.to_dict())
-                        elif hasattr(stmt, '__dict__'):
-                            statement_dicts.append(stmt.__dict__)
-                        elif isinstance(stmt, dict):
-                            statement_dicts.append(stmt)
-                        else:
-                            logger.error(f"Не удалось сериализовать Statement[{i}]: {type(stmt)}")
-                            continue
-                    except Exception as e2:
-                        logger.error(f"Не удалось сериализовать Statement[{i}] альтернативным способом: {e2}")
-                        continue
-
-            if not statement_dicts:
+            if not statements:
                 logger.warning("Нет валидных statements для отправки")
                 return LRSResponse(success=True, data="No statements to send")
 
-            logger.debug(f"Преобразовано в {len(statement_dicts)} словарей")
-
-            # Сериализуем список словарей в JSON-строку
-            # json_data = json.dumps(statement_dicts, ensure_ascii=False)
-            # logger.debug(f"Сериализовано в JSON строку размером {len(json_data)} символов")
-
-            response = self.lrs.save_statements(statement_dicts)
-            self._handle_response(response, statements)
+            logger.debug(f"Отправляем {len(statements)} высказываний в LRS {self.target} ({endpoint.url})")
+
+            # Тело пакета собирается из готовых байтов без повторной сериализации
+            body = b'[' + b','.join(statements) + b']'
+            logger.debug(f"Размер тела запроса: {len(body)} байт")
+            body, headers = self._encode_body(body)
+
+            response = endpoint.lrs._send_request(RawHTTPRequest(
+                method='POST',
+                resource='statements',
+                headers=headers,
+                content=body,
+            ))
+            # Ошибки сервера учитываются при выборе адреса; время ответа оценивают только проверки
+            endpoint.record(response.success or response.response.status < 500)
+            self._handle_response(response, statements, endpoint)
             return response
         except exceptions.XAPIBridgeStatementError:
             # Пробрасываем дальше, чтобы верхний уровень мог удалить проблемное высказывание
             raise
+        except exceptions.XAPIBridgeLRSConnectionError:
+            raise
         except (socket.gaierror, ConnectionRefusedError) as e:
-            error_msg = f"Ошибка подключения к LRS: {str(e)}"
+            endpoint.record(False)
+            error_msg = f"Ошибка подключения к LRS {self.target}: {str(e)}"
             logger.error(error_msg)
             raise exceptions.XAPIBridgeLRSConnectionError(
-                endpoint=settings.LRS_ENDPOINT,
+                endpoint=endpoint.url,
                 status_code=None
             ) from e
         except Exception as e:
-            error_msg = f"Неожиданная ошибка при отправке в LRS: {str(e)}"
+            endpoint.record(False)
+            error_msg = f"Неожиданная ошибка при отправке в LRS {self.target}: {str(e)}"
             logger.error(error_msg)
             logger.error(f"Тип исключения: {type(e).__name__}")
             raise exceptions.XAPIBridgeLRSConnectionError(
-                endpoint=settings.LRS_ENDPOINT,
+                endpoint=endpoint.url,
                 status_code=None
             ) from e
 
-    def _handle_response(self, response: LRSResponse, statements: StatementList) -> None:
+    def _handle_response(self, response: LRSResponse, statements: Sequence[bytes],
+                         endpoint: Optional[LRSEndpoint] = None) -> None:
         """Обработка ответа от LRS."""
         if response.success:
-            logger.info(f"Успешно отправлено {len(statements)} высказываний")
-            logger.debug(f"Успешно отправленные: {response.request.content}")
+            logger.info(f"Успешно отправлено {len(statements)} высказываний в LRS {self.target}")
             return
 
-        try:
-            if isinstance(response.data, str):
-                response_data = json.loads(response.data)
-            else:
-                response_data = response.data if response.data else {}
-        except json.JSONDecodeError:
-            response_data = {}
-
-        logger.debug(f"Success {response.success}")
-
-        logger.debug(response.request.headers)
-        logger.debug(response.request.method)
-        logger.debug(response.request.resource)
-        logger.debug(response.request.ignore404)
-        logger.debug(response.request.query_params)
-        logger.debug(response.request.content)
-
-        logger.debug(response.response.status)
-        logger.debug(response.response.reason)
-        logger.debug(response.response.read())
-        logger.debug(response.content)
-
-        # Преобразуем response_data в строку для методов бэкенда
-        response_data_str = json.dumps(response_data) if isinstance(response_data, dict) else str(response_data)
-        logger.debug(response_data_str)
-
-        if self.backend.request_unauthorised(response_data_str):
-            error_msg = "Ошибка авторизации в LRS"
+        status = response.response.status
+        response_data = self._parse_response_data(response.data)
+        logger.debug(f"Ответ LRS {self.target}: {status} {response.response.reason} - {response.data}")
+
+        # Тело ответа разбирается один раз, бэкенд классифицирует его за один проход
+        result, bad_index = self.backend.classify_response(status, response_data)
+
+        if result == RESPONSE_OK:
+            logger.info(f"Успешно отправлено {len(statements)} высказываний в LRS {self.target}")
+            return
+
+        if result in (RESPONSE_UNAUTHORISED, RESPONSE_SERVER_ERROR):
+            logger.error(
+                "Ошибка авторизации в LRS" if result == RESPONSE_UNAUTHORISED
+                else f"Ошибка сервера LRS {self.target}: {status} - {response.data}"
+            )
             raise exceptions.XAPIBridgeLRSConnectionError(
-                endpoint=settings.LRS_ENDPOINT,
-                status_code=None
+                endpoint=(endpoint or self.current_endpoint).url,
+                status_code=status
             )
 
-        if self.backend.response_has_storage_errors(response_data_str):
-            bad_index = self.backend.parse_error_response_for_bad_statement(response_data_str)
+        if result == RESPONSE_ERROR and 400 <= status < 500:
+            # Прочие ошибки клиента не теряют пакет молча: он делится, пока LRS не укажет
+            # на отклоненные высказывания, а они записываются в лог
+            logger.error(f"LRS {self.target} отклонила пакет: {status} - {response.data}")
+            result = RESPONSE_STORAGE_ERROR
+
+        if result == RESPONSE_STORAGE_ERROR:
+            if bad_index is not None and not 0 <= bad_index < len(statements):
+                bad_index = None
             bad_statement = statements[bad_index] if bad_index is not None else None
-            error_msg = (f"Ошибка сохранения высказывания: {response_data.get('message', '')} ",
-                        f"- {response_data_str} - {response.request.content}")
+            message = response_data.get('message', '') if isinstance(response_data, dict) else ''
+            error_msg = f"Ошибка сохранения высказывания: {status} {message} - {response.data}"
             # Создаем словарь с данными ошибки
             error_data = {
                 'response_data': response_data,
                 'bad_index': bad_index,
-                'bad_statement': str(bad_statement) if bad_statement else None
+                'bad_statement': bad_statement.decode('utf-8') if bad_statement else None
             }
             raise exceptions.XAPIBridgeStatementError(
                 raw_event=error_data,
@@ -184,10 +444,52 @@ class XAPIBridgeLRSPublisher:
                 statement=bad_statement
             )
 
-        error_msg = (f"Неопознанная ошибка отправки в LRS: {response.response.status} -"
-                    + f" {response_data_str}. Высказывания: {response.request.content}")
+        error_msg = f"Неопознанная ошибка отправки в LRS: {status} - {response.data}"
         logger.error(error_msg)
 
-# Инициализация клиента по умолчанию
-lrs_publisher = XAPIBridgeLRSPublisher()
+    @staticmethod
+    def _parse_response_data(data: Any) -> Any:
+        """Разбор тела ответа LRS из JSON."""
+        if not isinstance(data, (str, bytes)):
+            return data
+        try:
+            return json.loads(data) if data else None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+
+
+def split_batches(payloads: Iterable[bytes], max_count: int, max_bytes: int = 0) -> Iterator[List[bytes]]:
+    """
+    Делит сериализованные высказывания на пакеты по количеству и размеру тела.
+
+    Args:
+        payloads: Высказывания в виде JSON (bytes)
+        max_count: Максимальное количество высказываний в пакете
+        max_bytes: Максимальный размер JSON-тела пакета (0 - без ограничения)
+
+    Yields:
+        Списки высказываний для отдельных запросов к LRS
+    """
+    batch: List[bytes] = []
+    batch_bytes = 0
+    for payload in payloads:
+        if batch and (len(batch) >= max_count or (max_bytes and batch_bytes + len(payload) + 1 > max_bytes)):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(payload)
+        batch_bytes += len(payload) + (2 if len(batch) == 1 else 1)
+    if batch:
+        yield batch
+
+
+# Инициализация клиентов всех целей публикации
+lrs_publishers: Dict[str, XAPIBridgeLRSPublisher] = {
+    target: XAPIBridgeLRSPublisher(target, config)
+    for target, config in get_lrs_targets().items()
+}
+lrs_publisher = lrs_publishers[DEFAULT_LRS_TARGET]
+
+for _route, _target in (getattr(settings, 'LRS_ROUTES', None) or {}).items():
+    if _target not in lrs_publishers:
+        logger.error(f"Маршрут {_route} ссылается на неизвестную цель публикации {_target}, события пойдут в {DEFAULT_LRS_TARGET}")
 
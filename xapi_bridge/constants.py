@@ -6,6 +6,9 @@
 - Open edX Tracking Logs: https://edx.readthedocs.io/projects/open-edx-event-messages
 """
 
+# Версия спецификации xAPI, в которой сериализуются высказывания
+XAPI_VERSION = "1.0.3"
+
 # xAPI Verbs (Глаголы)
 XAPI_VERB_ATTACHED = "http://activitystrea.ms/schema/1.0/attach"
 XAPI_VERB_ATTEMPTED = "http://adlnet.gov/expapi/verbs/attempted"
@@ -41,6 +44,8 @@ XAPI_RESULT_VIDEO_TIME = "https://w3id.org/xapi/video/extensions/time"
 XAPI_RESULT_VIDEO_TIME_FROM = "https://w3id.org/xapi/video/extensions/time-from"
 XAPI_RESULT_VIDEO_TIME_TO = "https://w3id.org/xapi/video/extensions/time-to"
 XAPI_RESULT_VIDEO_CC_ENABLED = "https://w3id.org/xapi/video/extensions/cc-enabled"
+XAPI_RESULT_VIDEO_PLAYED_SEGMENTS = "https://w3id.org/xapi/video/extensions/played-segments"
+XAPI_RESULT_VIDEO_PROGRESS = "https://w3id.org/xapi/video/extensions/progress"
 
 XAPI_RESULT_EXTENSION_FILE_SIZE = "https://xapi.etu.ru/xapi/file-size"
 
@@ -2,10 +2,11 @@
 Конвертер событий трекинга Open edX в xAPI-высказывания.
 
 """
+import json
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from xapi_bridge import exceptions, settings
+from xapi_bridge import constants, exceptions, settings, validation
 from xapi_bridge.statements import (
     base, course, problem,
     video, vertical_block, attachment
@@ -41,6 +42,26 @@ TRACKING_EVENTS_TO_XAPI_STATEMENT_MAP = {
     'stop_video': video.VideoCompleteStatement,
 }
 
+# Линия публикации по умолчанию
+DEFAULT_PUBLISH_LANE = 'default'
+
+# Линии публикации для типов событий. Малочисленные, но важные высказывания
+# отправляются отдельно и не ждут за потоком видео-событий. Параметры
+# линий задаются настройкой PUBLISH_LANES; события, линия которых не
+# настроена, попадают в линию по умолчанию.
+TRACKING_EVENTS_PUBLISH_LANES = {
+    'edx.course.enrollment.activated': 'priority',
+    'edx.course.enrollment.deactivated': 'priority',
+    'edx.course.completed': 'priority',
+    'edx.course.expell': 'priority',
+}
+
+
+def get_publish_lane(evt: Dict) -> str:
+    """Возвращает имя линии публикации для события трекинга."""
+    event_type = _normalize_event_type(evt.get('event_type', 'none_type'))
+    return TRACKING_EVENTS_PUBLISH_LANES.get(event_type, DEFAULT_PUBLISH_LANE)
+
 
 def to_xapi(evt: Dict) -> Optional[Tuple[base.LMSTrackingLogStatement]]:
     """
@@ -81,6 +102,39 @@ def to_xapi(evt: Dict) -> Optional[Tuple[base.LMSTrackingLogStatement]]:
     return None
 
 
+def serialize_statement(statement: base.LMSTrackingLogStatement) -> Optional[bytes]:
+    """
+    Сериализует высказывание, проверяя его схемой xAPI, если проверка включена.
+
+    Returns:
+        JSON высказывания или None, если его не удалось закодировать
+        или оно не прошло проверку (тогда оно записано в dead letter)
+    """
+    try:
+        data = statement.as_version(constants.XAPI_VERSION)
+        if validation.statement_validator and not validation.statement_validator.is_valid(data):
+            return None
+        return _dump(data)
+    except Exception as e:
+        logger.error(f"Ошибка сериализации высказывания {type(statement).__name__}: {e}")
+        return None
+
+
+def serialize_statements(statements: Iterable[base.LMSTrackingLogStatement]) -> List[bytes]:
+    """Сериализует высказывания, пропуская те, что не удалось закодировать или проверить."""
+    payloads = []
+    for statement in statements:
+        payload = serialize_statement(statement)
+        if payload is not None:
+            payloads.append(payload)
+    return payloads
+
+
+def _dump(data: Dict) -> bytes:
+    """Компактный JSON; NaN и бесконечности LRS не примет, поэтому они запрещены."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
 def _normalize_event_type(event_type: str) -> str:
     """Нормализация типа события."""
     return event_type.replace("xblock-video.", "").strip()
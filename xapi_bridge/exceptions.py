@@ -82,6 +82,10 @@ class XAPIBridgeDataError(XAPIBridgeBaseException):
     """Ошибка обработки данных."""
 
 
+class XAPIBridgeLRSBackendResponseParseError(XAPIBridgeDataError):
+    """Ошибка разбора ответа LRS бэкендом."""
+
+
 class XAPIBridgeCourseNotFoundError(XAPIBridgeBaseException):
     """Исключение при отсутствии курса в LMS."""
 
@@ -7,13 +7,13 @@ import json
 import logging
 import os
 import time  # Для замера времени
-from tincan import StatementList
 import uuid
 import datetime
+import itertools
 import zoneinfo  # для работы с часовыми поясами
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from xapi_bridge import client, exceptions, settings
+from xapi_bridge import client, converter, exceptions, lms_prefetch, settings
 from xapi_bridge.statements.video import (
     VideoStatement, VideoCompleteStatement, VideoCheckStatement
 )
@@ -93,7 +93,8 @@ def process_historical_logs(log_file, batch_size=100, test_mode=False, output_fi
 
     try:
         start_time = time.time()
-        statements = read_and_transform_logs(log_file)
+        statement_targets: List[Tuple[str, ...]] = []
+        statements = read_and_transform_logs(log_file, statement_targets)
 
         if test_mode:
             if output_file:
@@ -105,38 +106,24 @@ def process_historical_logs(log_file, batch_size=100, test_mode=False, output_fi
                     statement_dict = statement.as_version('1.0.3')
                     print(json.dumps(statement_dict, ensure_ascii=False, indent=2))
         else:
-            # Разделение на пакеты и отправка в LRS
-            for i in range(0, len(statements), batch_size):
-                batch = statements[i:i + batch_size]
-                try:
-                    # Проверяем типы объектов в batch перед созданием StatementList
-                    invalid_statements = []
-                    for j, stmt in enumerate(batch):
-                        if not hasattr(stmt, 'as_version') and not hasattr(stmt, 'to_dict') and not hasattr(stmt, '__dict__') and not isinstance(stmt, dict):
-                            invalid_statements.append((j, type(stmt).__name__))
-                    
-                    if invalid_statements:
-                        logger.error(f"Обнаружены невалидные statements в batch: {invalid_statements}")
-                        # Удаляем невалидные statements из batch
-                        valid_batch = [stmt for stmt in batch if hasattr(stmt, 'as_version') or hasattr(stmt, 'to_dict') or hasattr(stmt, '__dict__') or isinstance(stmt, dict)]
-                        if not valid_batch:
-                            logger.warning("Нет валидных statements в batch, пропускаем")
-                            continue
-                        batch = valid_batch
-                    
-                    # Создаем StatementList из объектов Statement (преобразование в словари происходит в клиенте)
-                    logger.debug(f"Создаем StatementList из {len(batch)} высказываний")
+            # Высказывания сериализуются один раз и распределяются по целям публикации
+            target_payloads: Dict[str, List[bytes]] = {target: [] for target in client.lrs_publishers}
+            for statement, targets in zip(statements, statement_targets):
+                payload = converter.serialize_statement(statement)
+                if payload is None:
+                    continue
+                for target in targets:
+                    target_payloads[target].append(payload)
+
+            # Пакеты делятся по количеству и размеру тела
+            max_bytes = getattr(settings, 'PUBLISH_MAX_PAYLOAD_BYTES', 0)
+            for target, payloads in target_payloads.items():
+                for batch in client.split_batches(payloads, batch_size, max_bytes):
                     try:
-                        statement_list = StatementList(batch)
+                        client.lrs_publishers[target].publish_statements(batch)
+                        logger.info(f"Отправлено {len(batch)} утверждений в LRS {target}.")
                     except Exception as e:
-                        logger.error(f"Ошибка при создании StatementList: {e}")
-                        logger.error(f"Типы объектов в batch: {[type(stmt).__name__ for stmt in batch]}")
-                        raise
-                    
-                    client.lrs_publisher.publish_statements(statement_list)
-                    logger.info(f"Отправлено {len(batch)} утверждений в LRS.")
-                except Exception as e:
-                    logger.error(f"Ошибка при отправке пакета в LRS: {e}")
+                        logger.error(f"Ошибка при отправке пакета в LRS {target}: {e}")
 
         end_time = time.time()
         duration = end_time - start_time
@@ -150,31 +137,51 @@ def process_historical_logs(log_file, batch_size=100, test_mode=False, output_fi
         logger.error(f"Произошла ошибка: {e}")
         return []
 
-def read_and_transform_logs(log_file):
+def read_and_transform_logs(log_file, statement_targets=None):
     """
     Читает JSON лог, преобразует записи в формат xAPI.
 
     Args:
         log_file (str): Путь к файлу JSON лога.
+        statement_targets (list): Если передан, в него добавляются цели публикации каждого высказывания.
 
     Returns:
         list: Список xAPI утверждений (объекты Statement).
     """
     statements = []
     with open(log_file, 'r') as f:
-        for line in f:  # Читать построчно для больших файлов
-            try:
-                log_entry = json.loads(line)
-                xapi_statement = transform_json_log_entry_to_xapi(log_entry)  # Функция преобразования
-                if xapi_statement:
-                    statements.append(xapi_statement)
-            except json.JSONDecodeError:
-                logger.warning(f"Не удалось декодировать JSON: {line}")
-            except Exception as e:
-                logger.error(f"Ошибка при обработке JSON: {e}")
+        # Записи читаются порциями: пока конвертируется порция, данные пользователей
+        # и курсов следующей порции прогреваются в пуле предвыборки
+        chunk_size = max(getattr(settings, 'LMS_API_USER_BATCH_SIZE', 100), 1) * 10
+        next_entries = _read_log_chunk(f, chunk_size)
+        lms_prefetch.prefetch(next_entries)
+        while next_entries:
+            log_entries = next_entries
+            next_entries = _read_log_chunk(f, chunk_size)
+            lms_prefetch.prefetch(next_entries)
+
+            for log_entry in log_entries:
+                try:
+                    xapi_statement = transform_json_log_entry_to_xapi(log_entry)  # Функция преобразования
+                    if xapi_statement:
+                        statements.append(xapi_statement)
+                        if statement_targets is not None:
+                            statement_targets.append(client.get_event_targets(log_entry))
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке JSON: {e}")
 
     return statements
 
+def _read_log_chunk(f, chunk_size):
+    """Читает из файла до chunk_size записей JSON лога."""
+    log_entries = []
+    for line in itertools.islice(f, chunk_size):  # Читать построчно для больших файлов
+        try:
+            log_entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning(f"Не удалось декодировать JSON: {line}")
+    return log_entries
+
 def transform_json_log_entry_to_xapi(log_entry):
     """
     Преобразует запись из JSON лога в xAPI утверждение.
@@ -2,28 +2,65 @@
 Модуль для взаимодействия с API Open edX (LMS).
 """
 
+import functools
 import logging
-from typing import Any, Dict, Optional
-
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from pymemcache import serde
 from pymemcache.client import base as memcache
 from requests.exceptions import ConnectionError, Timeout
 from edx_rest_api_client.client import EdxRestApiClient
-from edx_rest_api_client.exceptions import HttpClientError, SlumberBaseException
+from edx_rest_api_client.exceptions import HttpClientError, HttpNotFoundError, SlumberBaseException
 
-from xapi_bridge import constants, exceptions, settings
+from xapi_bridge import exceptions, lms_store, lms_token, settings
+from xapi_bridge.lms_cache import NEGATIVE, LocalCache, SingleFlight
 
 
 logger = logging.getLogger(__name__)
 
 
-class BaseLMSAPIClient:
+class BaseLMSAPIClient(ABC):
     """Базовый клиент для работы с API Open edX."""
 
-    def __init__(self, api_base_url: str, cache_prefix: str):
+    # Таблица локального хранилища lms_store с данными клиента (None - клиент не читает хранилище)
+    store_table: Optional[str] = None
+
+    def __init__(self, api_base_url: str, cache_prefix: str, cache_ttl: float = 300):
+        """
+        Args:
+            api_base_url: Базовый URL API
+            cache_prefix: Префикс ключей кэша
+            cache_ttl: Срок жизни записей кэша (сек)
+        """
         self.api_base_url = api_base_url
         self.cache_prefix = cache_prefix
+        self.cache_ttl = cache_ttl
         self.cache = self._init_cache()
-        self.client = self._init_api_client()
+        self.negative_ttl = getattr(settings, 'LMS_API_NEGATIVE_CACHE_TTL', 60)
+        self.local_cache = LocalCache(
+            getattr(settings, 'LMS_API_LOCAL_CACHE_SIZE', 10000),
+            cache_ttl,
+            max_stale=getattr(settings, 'LMS_API_CACHE_MAX_STALE', 600),
+        )
+        self.memcache_hits = 0
+        self.memcache_misses = 0
+        self.negative_hits = 0
+        self.negative_sets = 0
+        # Одновременные промахи по одному ключу ждут один запрос к API
+        self.single_flight = SingleFlight()
+        # Фоновое обновление устаревших записей кэша
+        self.revalidate_executor: Optional[ThreadPoolExecutor] = None
+        self.revalidating: Set[str] = set()
+        self.revalidate_lock = threading.Lock()
+        self.revalidations = 0
+        self._client: Optional[EdxRestApiClient] = None
+        self._client_token: Optional[str] = None
+        self.client_lock = threading.Lock()
 
     def _init_cache(self) -> Optional[memcache.Client]:
         """Инициализация кэша."""
@@ -32,34 +69,218 @@ class BaseLMSAPIClient:
                 return memcache.Client(
                     settings.MEMCACHED_ADDRESS,
                     connect_timeout=2,
-                    timeout=5
+                    timeout=5,
+                    serde=serde.pickle_serde
                 )
             except Exception as e:
                 logger.error("Ошибка инициализации кэша: %s", e)
         return None
 
-    def _init_api_client(self) -> EdxRestApiClient:
-        """Инициализация API клиента с OAuth2."""
-        token = EdxRestApiClient.get_oauth_access_token(
-            url=f"{settings.OPENEDX_PLATFORM_URI}{constants.OPENEDX_OAUTH2_TOKEN_URL}",
-            client_id=settings.OPENEDX_OAUTH2_CLIENT_ID,
-            client_secret=settings.OPENEDX_OAUTH2_CLIENT_SECRET,
-        )
-        return EdxRestApiClient(
-            self.api_base_url,
-            append_slash=False,
-            oauth_access_token=token[0],
-            timeout=(3.05, 10)
+    def _cache_get(self, cache_key: str, revalidate: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+        """
+        Чтение из кэша: сначала память процесса, затем memcached.
+
+        Для записей, которых нет в LMS, возвращается NEGATIVE. Если передан
+        revalidate, устаревшая (не более LMS_API_CACHE_MAX_STALE секунд)
+        запись в памяти процесса возвращается сразу, а revalidate
+        выполняется в фоне и обновляет ее.
+        """
+        cached, stale = self.local_cache.lookup(cache_key, allow_stale=revalidate is not None)
+        if cached is not None and not stale:
+            return self._count_negative(cached)
+        # Отметки об отсутствии записи устаревшими не выдаются
+        if cached is not None and cached is not NEGATIVE:
+            self._revalidate(cache_key, revalidate)
+            return cached
+
+        if self.cache:
+            try:
+                cached = self.cache.get(cache_key)
+            except Exception as e:
+                logger.warning("Ошибка чтения из кэша: %s", e)
+                return None
+            if cached:
+                self.memcache_hits += 1
+                self._local_set(cache_key, cached)
+                return self._count_negative(cached)
+            self.memcache_misses += 1
+        return None
+
+    def _revalidate(self, cache_key: str, fetch: Callable[[], Any]) -> None:
+        """Ставит в фоновый пул обновление устаревшей записи, если оно еще не запущено."""
+        with self.revalidate_lock:
+            if cache_key in self.revalidating:
+                return
+            self.revalidating.add(cache_key)
+            self.revalidations += 1
+            if self.revalidate_executor is None:
+                self.revalidate_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix=f'{self.cache_prefix}revalidate'
+                )
+        self.revalidate_executor.submit(self._run_revalidate, cache_key, fetch)
+
+    def _run_revalidate(self, cache_key: str, fetch: Callable[[], Any]) -> None:
+        try:
+            # Запись могли уже обновить другие процессы через memcached
+            if self.cache:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    self._local_set(cache_key, cached)
+                    return
+            self.single_flight.do(cache_key, fetch)
+        except Exception as e:
+            logger.debug(f"Фоновое обновление {cache_key} не удалось: {e}")
+        finally:
+            with self.revalidate_lock:
+                self.revalidating.discard(cache_key)
+
+    def _count_negative(self, cached: Any) -> Any:
+        if cached is NEGATIVE:
+            self.negative_hits += 1
+        return cached
+
+    def _local_set(self, cache_key: str, value: Any) -> None:
+        """Запись в кэш процесса; отрицательные записи живут negative_ttl."""
+        self.local_cache.set(cache_key, value, ttl=self.negative_ttl if value is NEGATIVE else None)
+
+    def _cache_set(self, cache_key: str, value: Any) -> None:
+        """Запись в кэш процесса и memcached."""
+        self.local_cache.set(cache_key, value)
+        if self.cache:
+            try:
+                self.cache.set(cache_key, value, expire=int(self.cache_ttl))
+            except Exception as e:
+                logger.warning("Ошибка записи в кэш: %s", e)
+
+    def _cache_get_many(self, cache_keys: Iterable[str],
+                        revalidate: Optional[Callable[[str], Callable[[], Any]]] = None) -> Dict[str, Any]:
+        """
+        Пакетное чтение из кэша: один запрос get_many к memcached на все промахи в памяти.
+
+        Если передан revalidate (фабрика запроса по ключу кэша), устаревшие
+        записи в памяти процесса возвращаются, как в _cache_get, и обновляются в фоне.
+        """
+        found: Dict[str, Any] = {}
+        missing = []
+        for cache_key in cache_keys:
+            cached, stale = self.local_cache.lookup(cache_key, allow_stale=revalidate is not None)
+            if cached is not None and not stale:
+                found[cache_key] = self._count_negative(cached)
+            elif cached is not None and cached is not NEGATIVE:
+                self._revalidate(cache_key, revalidate(cache_key))
+                found[cache_key] = cached
+            else:
+                missing.append(cache_key)
+
+        if self.cache and missing:
+            try:
+                cached_many = self.cache.get_many(missing)
+            except Exception as e:
+                logger.warning("Ошибка чтения из кэша: %s", e)
+                return found
+            for cache_key, cached in cached_many.items():
+                if cached:
+                    self._local_set(cache_key, cached)
+                    found[cache_key] = self._count_negative(cached)
+            self.memcache_hits += len(cached_many)
+            self.memcache_misses += len(missing) - len(cached_many)
+        return found
+
+    def _cache_set_many(self, values: Dict[str, Any]) -> None:
+        """Пакетная запись в кэш процесса и один запрос set_many к memcached."""
+        if not values:
+            return
+        for cache_key, value in values.items():
+            self.local_cache.set(cache_key, value)
+        if self.cache:
+            try:
+                self.cache.set_many(values, expire=int(self.cache_ttl))
+            except Exception as e:
+                logger.warning("Ошибка записи в кэш: %s", e)
+
+    def _store_get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Данные из локального хранилища lms_store, если оно настроено."""
+        if not self.store_table or not keys:
+            return {}
+        store = lms_store.get_enrichment_store()
+        if store is None:
+            return {}
+        try:
+            records = store.get_many(self.store_table, keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка чтения хранилища данных LMS: {e}")
+            return {}
+        found = {}
+        for key, record in records.items():
+            try:
+                found[key] = self._parse_response(record)
+            except exceptions.XAPIBridgeBaseException:
+                logger.warning(f"Неполная запись {key} в хранилище данных LMS")
+        return found
+
+    @abstractmethod
+    def _parse_response(self, response: Dict) -> Dict[str, Any]:
+        """
+        Приводит ответ API или запись хранилища к данным клиента.
+
+        Raises:
+            XAPIBridgeBaseException: В ответе нет обязательных полей
+        """
+
+    def _cache_set_negative(self, cache_key: str) -> None:
+        """Запоминает на короткий срок, что записи нет в LMS, чтобы не запрашивать ее снова."""
+        self.negative_sets += 1
+        self._local_set(cache_key, NEGATIVE)
+        if self.cache and self.negative_ttl > 0:
+            try:
+                self.cache.set(cache_key, NEGATIVE, expire=int(self.negative_ttl))
+            except Exception as e:
+                logger.warning("Ошибка записи в кэш: %s", e)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов кэшей клиента."""
+        stats = {f'local_{key}': value for key, value in self.local_cache.stats().items()}
+        stats.update(
+            memcache_hits=self.memcache_hits,
+            memcache_misses=self.memcache_misses,
+            negative_hits=self.negative_hits,
+            negative_sets=self.negative_sets,
+            coalesced=self.single_flight.coalesced,
+            revalidations=self.revalidations,
         )
+        return stats
+
+    @property
+    def client(self) -> EdxRestApiClient:
+        """
+        API клиент с OAuth2.
+
+        Создается при первом обращении и пересоздается, когда общий
+        токен lms_token обновлен.
+        """
+        token = lms_token.token_provider.get()
+        with self.client_lock:
+            if self._client is None or self._client_token != token:
+                self._client = EdxRestApiClient(
+                    self.api_base_url,
+                    append_slash=False,
+                    oauth_access_token=token,
+                    timeout=(3.05, 10)
+                )
+                self._client_token = token
+            return self._client
 
 
 class EnrollmentApiClient(BaseLMSAPIClient):
     """Клиент для работы с API записей на курсы."""
 
+    store_table = 'courses'
+
     def __init__(self):
         super().__init__(
             api_base_url=settings.OPENEDX_ENROLLMENT_API_URI,
-            cache_prefix="enrollment_api_"
+            cache_prefix="enrollment_api_",
+            cache_ttl=getattr(settings, 'LMS_API_COURSE_CACHE_TTL', 300)
         )
 
     def get_course_info(self, event: Dict[str, Any]) -> Dict[str, Any]:
@@ -83,53 +304,159 @@ class EnrollmentApiClient(BaseLMSAPIClient):
             if not course_id:
                 raise exceptions.XAPIBridgeCourseNotFoundError("ID курса не найден в событии")
 
+            if getattr(settings, 'XAPI_COURSE_FROM_EVENT', False):
+                return self._event_course_data(context)
+
             # Сначала пробуем получить данные через API
             try:
                 cache_key = f"{self.cache_prefix}course_{course_id}"
 
-                # Попытка получить данные из кэша
-                if self.cache:
-                    try:
-                        cached = self.cache.get(cache_key)
-                        if cached:
-                            return cached
-                    except Exception as e:
-                        logger.warning("Ошибка чтения из кэша: %s", e)
+                # Каталог курсов в памяти, затем кэш
+                catalog = get_course_catalog()
+                course_data = catalog.get(course_id) if catalog else None
+                if course_data:
+                    return course_data
 
-                response = self.client.course(course_id).get(params={'include_expired': 1})
-                course_data = self._parse_response(response)
+                cached = self._cache_get(
+                    cache_key, revalidate=lambda: self._fetch_course(course_id, cache_key, cache=True)
+                )
+                if cached is NEGATIVE:
+                    return self._context_course_data(context)
+                if cached:
+                    return cached
 
-                # Кэширование на 5 минут
-                if self.cache and course_data:
-                    try:
-                        self.cache.set(cache_key, course_data, expire=300)
-                    except Exception as e:
-                        logger.warning("Ошибка записи в кэш: %s", e)
+                stored = self._store_get_many([course_id]).get(course_id)
+                if stored:
+                    return stored
+
+                return self.single_flight.do(cache_key, lambda: self._fetch_course(course_id, cache_key, cache=True))
 
-                return course_data
+            except HttpNotFoundError:
+                return self._context_course_data(context)
 
             except (SlumberBaseException, ConnectionError, Timeout, HttpClientError) as e:
                 logger.warning(f"Не удалось получить данные курса через API: {str(e)}")
                 # Если API недоступен, используем данные из события
-                course_data = {
-                    'name': context.get('module', {}).get('display_name', 'Курс'),
-                    'description': context.get('grandparent', {}).get('display_name', ''),
-                }
-
-                if settings.UNTI_XAPI:
-                    raw_2035_id = context.get('2035_id')
-                    course_data['2035_id'] = (
-                        '' if isinstance(raw_2035_id, bool)
-                        else (str(raw_2035_id).strip() if raw_2035_id is not None else '')
-                    )
-
-                return course_data
+                return self._context_course_data(context)
 
         except Exception as e:
             error_msg = f"Ошибка получения данных курса: {str(e)}"
             logger.error(error_msg)
             raise exceptions.XAPIBridgeCourseNotFoundError(error_msg) from e
 
+    def resolve_courses(self, course_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Пакетное получение данных курсов.
+
+        Кэш читается одним запросом, API вызывается только для промахов,
+        полученные данные записываются в кэш одним запросом. Ошибки API
+        только логируются: для таких курсов при построении высказывания
+        используются данные события.
+
+        Args:
+            course_ids: Идентификаторы курсов
+
+        Returns:
+            Данные найденных курсов по идентификаторам
+        """
+        course_ids = [course_id for course_id in dict.fromkeys(course_ids) if course_id]
+        resolved: Dict[str, Dict[str, Any]] = {}
+        catalog = get_course_catalog()
+        if catalog:
+            for course_id in course_ids:
+                course_data = catalog.get(course_id)
+                if course_data:
+                    resolved[course_id] = course_data
+            course_ids = [course_id for course_id in course_ids if course_id not in resolved]
+
+        cache_keys = {f"{self.cache_prefix}course_{course_id}": course_id for course_id in course_ids}
+        cached = self._cache_get_many(
+            cache_keys,
+            revalidate=lambda cache_key: functools.partial(self._fetch_course, cache_keys[cache_key], cache_key, cache=True),
+        )
+        missing: List[str] = []
+        for course_id in course_ids:
+            course_data = cached.get(f"{self.cache_prefix}course_{course_id}")
+            if course_data is NEGATIVE:
+                continue
+            if course_data:
+                resolved[course_id] = course_data
+            else:
+                missing.append(course_id)
+
+        stored = self._store_get_many(missing)
+        resolved.update(stored)
+
+        fetched: Dict[str, Dict[str, Any]] = {}
+        for course_id in missing:
+            if course_id in stored:
+                continue
+            cache_key = f"{self.cache_prefix}course_{course_id}"
+            try:
+                course_data = self.single_flight.do(cache_key, lambda: self._fetch_course(course_id, cache_key))
+            except HttpNotFoundError:
+                continue
+            except (SlumberBaseException, ConnectionError, Timeout, HttpClientError,
+                    exceptions.XAPIBridgeCourseNotFoundError) as e:
+                logger.warning(f"Не удалось получить данные курса {course_id} через API: {str(e)}")
+                continue
+            fetched[cache_key] = resolved[course_id] = course_data
+
+        self._cache_set_many(fetched)
+        return resolved
+
+    def _fetch_course(self, course_id: str, cache_key: str, cache: bool = False) -> Dict[str, Any]:
+        """
+        Запрос данных курса через API (выполняется одним потоком на ключ).
+
+        Ненайденный курс запоминается в кэше как отсутствующий.
+        """
+        try:
+            response = self.client.course(course_id).get(params={'include_expired': 1})
+        except HttpNotFoundError:
+            logger.warning(f"Курс {course_id} не найден в LMS, используются данные события")
+            self._cache_set_negative(cache_key)
+            raise
+        course_data = self._parse_response(response)
+        if cache:
+            self._cache_set(cache_key, course_data)
+        return course_data
+
+    @staticmethod
+    def _event_course_data(context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Данные курса в режиме XAPI_COURSE_FROM_EVENT.
+
+        В контексте события есть только названия блоков (context.module - текущий
+        блок), а не название курса. Чтобы события разных блоков не присылали
+        разные определения одной активности курса, name и description не передаются.
+        """
+        course_data: Dict[str, Any] = {}
+        if settings.UNTI_XAPI:
+            raw_2035_id = context.get('2035_id')
+            course_data['2035_id'] = (
+                '' if isinstance(raw_2035_id, bool)
+                else (str(raw_2035_id).strip() if raw_2035_id is not None else '')
+            )
+        return course_data
+
+    @staticmethod
+    def _context_course_data(context: Dict[str, Any]) -> Dict[str, Any]:
+        """Данные курса из контекста события, если API их не вернул."""
+        course_data = {
+            'name': context.get('module', {}).get('display_name', 'Курс'),
+            'description': context.get('grandparent', {}).get('display_name', ''),
+        }
+
+        if settings.UNTI_XAPI:
+            raw_2035_id = context.get('2035_id')
+            course_data['2035_id'] = (
+                '' if isinstance(raw_2035_id, bool)
+                else (str(raw_2035_id).strip() if raw_2035_id is not None else '')
+            )
+
+        return course_data
+
     def _parse_response(self, response: Dict) -> Dict[str, Any]:
         """Парсинг и валидация ответа API."""
         if not response.get('course_name'):
@@ -150,22 +477,114 @@ class EnrollmentApiClient(BaseLMSAPIClient):
         return data
 
 
+class CourseCatalogClient(BaseLMSAPIClient):
+    """
+    Каталог курсов в памяти.
+
+    Загружается целиком постраничным списком API курсов в фоновом потоке
+    и перезагружается раз в LMS_COURSE_CATALOG_REFRESH_INTERVAL секунд,
+    поэтому данные курсов берутся из словаря без запросов к API. Курсы,
+    которых еще нет в каталоге (в том числе до первой загрузки),
+    запрашиваются EnrollmentApiClient.
+    """
+
+    # Записи списка курсов разбираются так же, как ответы API записей на курсы
+    _parse_response = EnrollmentApiClient._parse_response
+
+    def __init__(self):
+        super().__init__(
+            api_base_url=getattr(settings, 'OPENEDX_COURSES_API_URI', f'{settings.OPENEDX_PLATFORM_URI}/api/courses/v1/'),
+            cache_prefix="course_catalog_",
+        )
+        self.refresh_interval = getattr(settings, 'LMS_COURSE_CATALOG_REFRESH_INTERVAL', 0)
+        self.page_size = getattr(settings, 'LMS_COURSE_CATALOG_PAGE_SIZE', 100)
+        self.courses: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at: Optional[float] = None
+        self.refresh_thread: Optional[threading.Thread] = None
+        self.start_lock = threading.Lock()
+
+    def get(self, course_id: str) -> Optional[Dict[str, Any]]:
+        """Данные курса из каталога или None, если курса в каталоге нет."""
+        return self.courses.get(course_id)
+
+    def start(self) -> None:
+        """Запуск фоновой загрузки и обновления каталога (повторные вызовы ничего не делают)."""
+        with self.start_lock:
+            if self.refresh_thread is not None:
+                return
+            self.refresh_thread = threading.Thread(
+                target=self._refresh_loop, name='lms-course-catalog', daemon=True
+            )
+            self.refresh_thread.start()
+
+    def refresh(self) -> bool:
+        """
+        Загружает список курсов и заменяет им каталог.
+
+        При ошибке API остается прежний каталог.
+
+        Returns:
+            True, если каталог загружен
+        """
+        start_time = time.monotonic()
+        courses: Dict[str, Dict[str, Any]] = {}
+        page = 1
+        try:
+            while True:
+                response = self.client.courses().get(page=page, page_size=self.page_size)
+                for record in response.get('results') or []:
+                    normalized = lms_store.normalize_record('courses', record)
+                    if normalized is None:
+                        continue
+                    try:
+                        courses[normalized['course_id']] = self._parse_response(normalized)
+                    except exceptions.XAPIBridgeCourseNotFoundError:
+                        continue
+                if not (response.get('pagination') or {}).get('next'):
+                    break
+                page += 1
+        except (SlumberBaseException, ConnectionError, Timeout, HttpClientError) as e:
+            logger.warning(f"Не удалось загрузить каталог курсов (страница {page}): {e}")
+            return False
+
+        self.courses = courses
+        self.loaded_at = time.time()
+        logger.info(f"Каталог курсов загружен: {len(courses)} курсов за {time.monotonic() - start_time:.2f} сек")
+        return True
+
+    def _refresh_loop(self) -> None:
+        """Первая загрузка сразу после запуска, затем обновление раз в refresh_interval."""
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка обновления каталога курсов: {e}")
+            # Пока каталог ни разу не загружен, попытки повторяются чаще
+            time.sleep(self.refresh_interval if self.loaded_at else min(self.refresh_interval, 60))
+
+
 class UserApiClient(BaseLMSAPIClient):
     """Клиент для работы с API пользователей."""
 
+    store_table = 'users'
+
     def __init__(self):
         super().__init__(
             api_base_url=settings.OPENEDX_USER_API_URI,
-            cache_prefix="user_api_"
+            cache_prefix="user_api_",
+            cache_ttl=getattr(settings, 'LMS_API_USER_CACHE_TTL', 300)
         )
 
     def get_edx_user_info(self, username: str) -> Dict[str, str]:
         """
         Получение информации о пользователе.
-        Сначала пытается получить данные через API, если не получается - использует данные из события.
+
+        Пользователи, которых нет в LMS, запоминаются в кэше на
+        LMS_API_NEGATIVE_CACHE_TTL секунд: повторные события такого
+        пользователя не обращаются к API и не пишут ошибок в лог.
 
         Args:
-            event: Событие из логов трекинга
+            username: Имя пользователя
 
         Returns:
             Словарь с данными пользователя
@@ -174,37 +593,128 @@ class UserApiClient(BaseLMSAPIClient):
             XAPIBridgeUserNotFoundError: Если пользователь не найден
         """
         if not username or username == 'anonymous':
-            raise exceptions.XAPIBridgeUserNotFoundError()
+            # Анонимные события не имеют пользователя, обращение к API не требуется
+            raise exceptions.XAPIBridgeUserNotFoundError({}, username or 'anonymous')
 
-        # Пробуем получить данные через API
-        try:
-            cache_key = f"{self.cache_prefix}user_{username}"
+        cache_key = f"{self.cache_prefix}user_{username}"
 
-            # Попытка получить данные из кэша
-            if self.cache:
-                try:
-                    cached = self.cache.get(cache_key)
-                    if cached:
-                        return cached
-                except Exception as e:
-                    logger.warning("Ошибка чтения из кэша: %s", e)
+        # Попытка получить данные из кэша
+        cached = self._cache_get(cache_key, revalidate=lambda: self._fetch_user(username, cache_key, quiet=True))
+        if cached is NEGATIVE:
+            raise exceptions.XAPIBridgeUserNotFoundError({}, username)
+        if cached:
+            return cached
+
+        stored = self._store_get_many([username]).get(username)
+        if stored:
+            return stored
+
+        return self.single_flight.do(cache_key, lambda: self._fetch_user(username, cache_key))
 
+    def _fetch_user(self, username: str, cache_key: str, quiet: bool = False) -> Dict[str, str]:
+        """
+        Запрос данных пользователя через API (выполняется одним потоком на ключ).
+
+        Args:
+            username: Имя пользователя
+            cache_key: Ключ кэша пользователя
+            quiet: Не писать ошибки API в лог (фоновое обновление устаревшей записи,
+                которая продолжает выдаваться, пока API недоступен)
+        """
+        try:
             response = self.client.accounts(username).get()
             user_data = self._parse_response(response)
 
-            # Кэширование на 5 минут
-            if self.cache and user_data:
-                try:
-                    self.cache.set(cache_key, user_data, expire=300)
-                except Exception as e:
-                    logger.warning("Ошибка записи в кэш: %s", e)
-
-            return user_data
+        except (HttpNotFoundError, exceptions.XAPIBridgeUserNotFoundError) as e:
+            logger.warning(f"Пользователь {username} не найден в LMS")
+            self._cache_set_negative(cache_key)
+            raise exceptions.XAPIBridgeUserNotFoundError({}, username) from e
 
         except Exception as e:
             error_msg = f"Ошибка получения данных пользователя: {str(e)}"
-            logger.error(error_msg)
-            raise exceptions.XAPIBridgeUserNotFoundError(event, username or 'unknown') from e
+            if quiet:
+                logger.debug(error_msg)
+            else:
+                logger.error(error_msg)
+            raise exceptions.XAPIBridgeUserNotFoundError({}, username) from e
+
+        self._cache_set(cache_key, user_data)
+        return user_data
+
+    def resolve_users(self, usernames: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Пакетное получение данных пользователей.
+
+        Пользователи, которых нет в кэше, запрашиваются через API учетных
+        записей порциями по LMS_API_USER_BATCH_SIZE имен (параметр username
+        через запятую), результаты сохраняются в кэш. Ошибки API только
+        логируются: ненайденные пользователи позже запрашиваются по одному.
+
+        Args:
+            usernames: Имена пользователей
+
+        Returns:
+            Данные найденных пользователей по именам
+        """
+        usernames = [
+            username for username in dict.fromkeys(usernames)
+            if username and username != 'anonymous'
+        ]
+        cache_keys = {f"{self.cache_prefix}user_{username}": username for username in usernames}
+        cached = self._cache_get_many(
+            cache_keys,
+            revalidate=lambda cache_key: functools.partial(self._fetch_user, cache_keys[cache_key], cache_key, quiet=True),
+        )
+        resolved: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+        for username in usernames:
+            user_data = cached.get(f"{self.cache_prefix}user_{username}")
+            if user_data is NEGATIVE:
+                continue
+            if user_data:
+                resolved[username] = user_data
+            else:
+                missing.append(username)
+
+        stored = self._store_get_many(missing)
+        resolved.update(stored)
+        missing = [username for username in missing if username not in stored]
+
+        batch_size = getattr(settings, 'LMS_API_USER_BATCH_SIZE', 100)
+        if not missing or batch_size <= 0:
+            return resolved
+
+        # Пользователи, которых уже запрашивают другие потоки, в пакет не включаются
+        prefix_length = len(f"{self.cache_prefix}user_")
+        claimed = self.single_flight.claim(f"{self.cache_prefix}user_{username}" for username in missing)
+        missing = [cache_key[prefix_length:] for cache_key in claimed]
+
+        fetched: Dict[str, Dict[str, str]] = {}
+        try:
+            for start in range(0, len(missing), batch_size):
+                chunk = missing[start:start + batch_size]
+                try:
+                    response = self.client.accounts().get(username=','.join(chunk))
+                except Exception as e:
+                    logger.warning(f"Ошибка пакетного получения данных {len(chunk)} пользователей: {e}")
+                    continue
+
+                for account in response if isinstance(response, list) else [response]:
+                    username = account.get('username')
+                    try:
+                        user_data = self._parse_response(account)
+                    except exceptions.XAPIBridgeUserNotFoundError:
+                        continue
+                    fetched[f"{self.cache_prefix}user_{username}"] = user_data
+                    resolved[username] = user_data
+
+            self._cache_set_many(fetched)
+        finally:
+            # Ожидающие пользователей, которых нет в ответе, запросят их по одному
+            for cache_key in claimed:
+                self.single_flight.resolve(cache_key, fetched.get(cache_key))
+        logger.debug(f"Пакетно получены данные {len(resolved)} из {len(usernames)} пользователей")
+        return resolved
 
     def _parse_response(self, response: Dict) -> Dict[str, str]:
         """Парсинг и валидация ответа API."""
@@ -226,6 +736,98 @@ class UserApiClient(BaseLMSAPIClient):
         return data
 
 
-# Инициализация клиентов для использования в других модулях
-enrollment_api_client = EnrollmentApiClient()
-user_api_client = UserApiClient()
+def get_event_username(event: Dict[str, Any]) -> Optional[str]:
+    """Имя пользователя события в том же порядке поиска, что и при построении actor."""
+    username = event.get('username')
+    if not username or username.strip() == '' or username == 'anonymous':
+        event_data = event.get('event')
+        username = event_data.get('username') if isinstance(event_data, dict) else None
+    if not username or username.strip() == '' or username == 'anonymous':
+        module = (event.get('context') or {}).get('module') or {}
+        username = module.get('username')
+    return username or None
+
+
+def get_event_course_id(event: Dict[str, Any]) -> Optional[str]:
+    """Идентификатор курса события."""
+    return (event.get('context') or {}).get('course_id') or None
+
+
+def user_enrichment_enabled() -> bool:
+    """Нужны ли данные пользователей из API (не нужны при XAPI_ACTOR_IDENTITY = 'account')."""
+    return getattr(settings, 'XAPI_ACTOR_IDENTITY', 'lms') != 'account'
+
+
+def course_enrichment_enabled() -> bool:
+    """Нужны ли данные курсов из API (не нужны при XAPI_COURSE_FROM_EVENT)."""
+    return not getattr(settings, 'XAPI_COURSE_FROM_EVENT', False)
+
+
+def prefetch_enrichment(events: Iterable[Dict[str, Any]]) -> None:
+    """
+    Заранее получает пакетом данные пользователей и курсов для порции событий.
+
+    Кэш читается одним get_many на клиент, API запрашивается только для
+    промахов, результаты записываются одним set_many.
+    """
+    events = list(events)
+    if user_enrichment_enabled():
+        get_user_api_client().resolve_users(
+            username for username in map(get_event_username, events) if username
+        )
+    if course_enrichment_enabled():
+        get_enrollment_api_client().resolve_courses(
+            course_id for course_id in map(get_event_course_id, events) if course_id
+        )
+
+
+# Общие клиенты создаются при первом обращении: импорт модуля не обращается к сети
+_clients: Dict[str, BaseLMSAPIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(name: str, client_class: type) -> BaseLMSAPIClient:
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = client_class()
+    return client
+
+
+def get_enrollment_api_client() -> EnrollmentApiClient:
+    """Общий клиент API записей на курсы."""
+    return _get_client('enrollment_api_client', EnrollmentApiClient)
+
+
+def get_user_api_client() -> UserApiClient:
+    """Общий клиент API пользователей."""
+    return _get_client('user_api_client', UserApiClient)
+
+
+def get_course_catalog() -> Optional[CourseCatalogClient]:
+    """
+    Общий каталог курсов; при первом обращении запускается его фоновая загрузка.
+
+    Returns:
+        None, если каталог отключен настройкой LMS_COURSE_CATALOG_REFRESH_INTERVAL,
+        данные курсов берутся из событий или включен UNTI_XAPI (в списке курсов
+        нет integrate_2035_id, его возвращает только API записей на курсы)
+    """
+    if (getattr(settings, 'LMS_COURSE_CATALOG_REFRESH_INTERVAL', 0) <= 0 or not course_enrichment_enabled()
+            or settings.UNTI_XAPI):
+        return None
+    catalog = _get_client('course_catalog', CourseCatalogClient)
+    if catalog.refresh_thread is None:
+        catalog.start()
+    return catalog
+
+
+def __getattr__(name: str) -> Any:
+    """Прежние имена модуля lms_api.enrollment_api_client и lms_api.user_api_client."""
+    if name == 'enrollment_api_client':
+        return get_enrollment_api_client()
+    if name == 'user_api_client':
+        return get_user_api_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
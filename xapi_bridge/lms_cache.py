@@ -0,0 +1,178 @@
+"""
+Кэш данных LMS в памяти процесса.
+
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class _Negative:
+    """Отметка записи, которой нет в LMS; после pickle остается тем же объектом."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return 'NEGATIVE'
+
+    def __repr__(self):
+        return 'NEGATIVE'
+
+
+# Значение отрицательной записи кэша: пользователь или курс не найден в LMS
+NEGATIVE = _Negative()
+
+
+class LocalCache:
+    """
+    Ограниченный LRU-кэш со сроком жизни записей.
+
+    Стоит перед memcached: повторные запросы данных одного пользователя
+    или курса обслуживаются из словаря без сетевых обращений. Устаревшие
+    записи хранятся еще max_stale секунд и доступны через lookup.
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_stale: float = 0):
+        """
+        Args:
+            max_size: Максимальное количество записей (0 - кэш отключен)
+            ttl: Срок жизни записи по умолчанию (сек)
+            max_stale: Сколько секунд после истечения срока запись еще может быть выдана через lookup
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Возвращает значение или None, если записи нет или она устарела."""
+        value, stale = self.lookup(key, allow_stale=False)
+        return value
+
+    def lookup(self, key: str, allow_stale: bool = True) -> Tuple[Optional[Any], bool]:
+        """
+        Возвращает значение и признак того, что срок жизни записи истек.
+
+        Записи, устаревшие больше чем на max_stale секунд, удаляются.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] + self.max_stale <= now:
+                del self.entries[key]
+                entry = None
+            if entry is None or (not allow_stale and entry[0] <= now):
+                self.misses += 1
+                return None, False
+            self.entries.move_to_end(key)
+            stale = entry[0] <= now
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry[1], stale
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохраняет значение, вытесняя давно не использованные записи."""
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов."""
+        return {'size': len(self.entries), 'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses}
+
+
+class _Flight:
+    """Выполняющийся запрос одного ключа."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Объединение одновременных запросов одного ключа.
+
+    Первый промах по ключу выполняет запрос, остальные потоки ждут его
+    и получают тот же результат или то же исключение.
+    """
+
+    def __init__(self):
+        self.flights: Dict[str, _Flight] = {}
+        self.lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Выполняет fetch для ключа или ждет уже выполняющийся запрос.
+
+        Если ведущий запрос завершился без результата (ключ был заявлен
+        пакетным запросом через claim и не найден), запрос выполняется заново.
+        """
+        while True:
+            with self.lock:
+                flight = self.flights.get(key)
+                if flight is None:
+                    flight = self.flights[key] = _Flight()
+                    break
+                self.coalesced += 1
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is not None:
+                return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._finish(key, flight)
+
+    def claim(self, keys: Iterable[str]) -> List[str]:
+        """
+        Заявляет ключи для пакетного запроса.
+
+        Returns:
+            Ключи, которые еще никто не запрашивает; каждый из них нужно
+            завершить через resolve
+        """
+        claimed = []
+        with self.lock:
+            for key in keys:
+                if key not in self.flights:
+                    self.flights[key] = _Flight()
+                    claimed.append(key)
+        return claimed
+
+    def resolve(self, key: str, result: Any = None) -> None:
+        """Завершает заявленный ключ; None - ожидающие выполнят запрос сами."""
+        with self.lock:
+            flight = self.flights.get(key)
+        if flight is not None:
+            flight.result = result
+            self._finish(key, flight)
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.done.set()
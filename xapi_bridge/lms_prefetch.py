@@ -0,0 +1,149 @@
+"""
+Упреждающее получение данных LMS для прочитанных событий.
+
+Конвертация событий синхронно обращается к API LMS при построении actor
+и описания курса, и каждый промах кэша останавливает весь конвейер.
+Предвыборка извлекает имена пользователей и идентификаторы курсов из
+сырых событий сразу после чтения и прогревает кэши клиентов lms_api в
+ограниченном пуле потоков, пока основной поток конвертирует события.
+
+"""
+
+import logging
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from xapi_bridge import lms_api, settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentPrefetcher:
+    """
+    Прогрев кэшей пользователей и курсов в пуле потоков.
+
+    Количество задач в очереди пула ограничено: при переполнении
+    предвыборка пропускается, и данные будут получены при конвертации.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        """
+        Args:
+            workers: Количество потоков пула
+            max_pending: Максимальное количество поставленных и выполняемых задач
+        """
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lms-prefetch')
+        self.slots = threading.BoundedSemaphore(max_pending)
+        # Ключи, которые уже запрашиваются: ('user', имя) или ('course', идентификатор)
+        self.inflight: Set[Tuple[str, str]] = set()
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def submit(self, events: Iterable[Dict[str, Any]]) -> List[Future]:
+        """
+        Ставит в пул получение данных пользователей и курсов событий.
+
+        Returns:
+            Задачи предвыборки (ожидать их не обязательно)
+        """
+        usernames: Dict[str, None] = {}
+        course_ids: Dict[str, None] = {}
+        with_users = lms_api.user_enrichment_enabled()
+        with_courses = lms_api.course_enrichment_enabled()
+        for event in events:
+            username = lms_api.get_event_username(event) if with_users else None
+            if username and username != 'anonymous':
+                usernames[username] = None
+            course_id = lms_api.get_event_course_id(event) if with_courses else None
+            if course_id:
+                course_ids[course_id] = None
+
+        futures = []
+        # Пользователи запрашиваются пакетами API учетных записей
+        user_chunk = max(getattr(settings, 'LMS_API_USER_BATCH_SIZE', 100), 1)
+        futures += self._submit_chunks('user', list(usernames), user_chunk, lms_api.get_user_api_client().resolve_users)
+        # Курсы запрашиваются по одному, поэтому распределяются по всем потокам
+        courses = list(course_ids)
+        course_chunk = max(math.ceil(len(courses) / self.workers), 1)
+        futures += self._submit_chunks('course', courses, course_chunk, lms_api.get_enrollment_api_client().resolve_courses)
+        return futures
+
+    def _submit_chunks(self, kind: str, keys: List[str], chunk_size: int,
+                       resolve: Callable[[List[str]], Any]) -> List[Future]:
+        """Ставит в пул порции ключей, которые еще не запрашиваются."""
+        with self.lock:
+            keys = [key for key in keys if (kind, key) not in self.inflight]
+            self.inflight.update((kind, key) for key in keys)
+
+        futures = []
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            if not self.slots.acquire(blocking=False):
+                self._release(kind, keys[start:])
+                self.skipped += len(keys) - start
+                logger.debug(f"Очередь предвыборки заполнена, пропущено ключей: {len(keys) - start}")
+                break
+            self.submitted += len(chunk)
+            futures.append(self.executor.submit(self._run, kind, chunk, resolve))
+        return futures
+
+    def _run(self, kind: str, keys: List[str], resolve: Callable[[List[str]], Any]) -> None:
+        """Выполнение порции предвыборки в потоке пула."""
+        try:
+            resolve(keys)
+        except Exception as e:
+            self.failed += len(keys)
+            logger.warning(f"Ошибка предвыборки данных LMS ({kind}): {e}")
+        finally:
+            self._release(kind, keys)
+            self.slots.release()
+
+    def _release(self, kind: str, keys: List[str]) -> None:
+        with self.lock:
+            self.inflight.difference_update((kind, key) for key in keys)
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики предвыборки."""
+        return {'submitted': self.submitted, 'skipped': self.skipped, 'failed': self.failed}
+
+    def shutdown(self) -> None:
+        """Остановка пула без ожидания незавершенных задач."""
+        self.executor.shutdown(wait=False)
+
+
+def _create_prefetcher() -> Optional[EnrichmentPrefetcher]:
+    """Создает пул предвыборки, если он включен настройкой LMS_API_PREFETCH_WORKERS."""
+    workers = getattr(settings, 'LMS_API_PREFETCH_WORKERS', 4)
+    if workers <= 0:
+        return None
+    return EnrichmentPrefetcher(workers, max(getattr(settings, 'LMS_API_PREFETCH_MAX_PENDING', 100), 1))
+
+
+def prefetch(events: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Future]:
+    """
+    Прогревает кэши данных LMS для порции событий.
+
+    Без пула предвыборки данные получаются синхронно, пакетом до конвертации.
+
+    Args:
+        events: Порция прочитанных событий
+        timeout: Если задан, ожидать завершения предвыборки не дольше timeout секунд;
+            оставшиеся ключи будут получены при конвертации
+    """
+    if prefetcher is None:
+        lms_api.prefetch_enrichment(events)
+        return []
+    futures = prefetcher.submit(events)
+    if timeout and futures:
+        wait(futures, timeout=timeout)
+    return futures
+
+
+# Пул предвыборки по умолчанию (None, если предвыборка отключена)
+prefetcher = _create_prefetcher()
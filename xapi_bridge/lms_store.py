@@ -0,0 +1,242 @@
+"""
+Локальное хранилище данных пользователей и курсов LMS.
+
+Для исторических выгрузок данные пользователей и курсов загружаются
+пакетом из выгрузок базы LMS (CSV, JSON или JSON Lines) в файл SQLite.
+Клиенты lms_api обращаются к хранилищу до API, поэтому выгрузка
+с заполненным хранилищем выполняется без запросов к LMS.
+
+Пример загрузки:
+    python -m xapi_bridge.lms_store /var/lib/xapi-bridge/lms.sqlite3 users users.csv
+    python -m xapi_bridge.lms_store /var/lib/xapi-bridge/lms.sqlite3 courses courses.jsonl
+
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xapi_bridge import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Таблицы хранилища: столбцы повторяют поля ответов API, первый столбец - ключ.
+# Для каждого столбца указаны имена, под которыми он встречается в выгрузках.
+TABLES: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    'users': (
+        ('username', ('username',)),
+        ('email', ('email',)),
+        ('name', ('name', 'full_name', 'fullname', 'profile_name')),
+        ('unti_id', ('unti_id',)),
+    ),
+    'courses': (
+        ('course_id', ('course_id', 'id', 'course_key')),
+        ('course_name', ('course_name', 'display_name', 'name')),
+        ('description', ('description', 'short_description')),
+        ('integrate_2035_id', ('integrate_2035_id', '2035_id')),
+    ),
+}
+
+# Количество строк в одной вставке при загрузке
+LOAD_BATCH_SIZE = 10000
+# Ограничение количества параметров в одном запросе SQLite
+QUERY_BATCH_SIZE = 500
+
+
+class EnrichmentStore:
+    """Хранилище SQLite с данными пользователей и курсов в формате ответов API."""
+
+    def __init__(self, path: str, readonly: bool = True):
+        """
+        Args:
+            path: Файл базы SQLite
+            readonly: Открыть только для чтения (при загрузке - False)
+        """
+        self.path = path
+        if readonly:
+            # В URI символы пути вроде ?, # и % экранируются, иначе SQLite примет их за параметры
+            uri = f'{pathlib.Path(path).resolve().as_uri()}?mode=ro'
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self._create_tables()
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _create_tables(self) -> None:
+        for table, columns in TABLES.items():
+            key, *fields = [column for column, _ in columns]
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ({key} TEXT PRIMARY KEY, "
+                f"{', '.join(f'{field} TEXT' for field in fields)}) WITHOUT ROWID"
+            )
+        self.connection.commit()
+
+    def get_many(self, table: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Пакетное чтение записей таблицы.
+
+        Returns:
+            Найденные записи в формате ответа API (без пустых полей) по ключам
+        """
+        keys = list(dict.fromkeys(key for key in keys if key))
+        key_column = TABLES[table][0][0]
+        found: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            for start in range(0, len(keys), QUERY_BATCH_SIZE):
+                chunk = keys[start:start + QUERY_BATCH_SIZE]
+                rows = self.connection.execute(
+                    f"SELECT * FROM {table} WHERE {key_column} IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                for row in rows:
+                    found[row[key_column]] = {
+                        column: value for column, value in dict(row).items() if value is not None
+                    }
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def load(self, table: str, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Загружает записи выгрузки в таблицу, заменяя существующие.
+
+        Returns:
+            Количество загруженных записей
+        """
+        columns = TABLES[table]
+        query = (
+            f"INSERT OR REPLACE INTO {table} ({', '.join(column for column, _ in columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        loaded = skipped = 0
+        batch: List[Tuple[Optional[str], ...]] = []
+        with self.lock:
+            # Журнал на время загрузки не нужен: при сбое загрузку просто повторяют
+            self.connection.execute('PRAGMA journal_mode=OFF')
+            self.connection.execute('PRAGMA synchronous=OFF')
+            for record in records:
+                normalized = normalize_record(table, record)
+                if normalized is None:
+                    skipped += 1
+                    continue
+                batch.append(tuple(normalized.get(column) for column, _ in columns))
+                if len(batch) >= LOAD_BATCH_SIZE:
+                    loaded += self._insert(query, batch)
+            loaded += self._insert(query, batch)
+            self.connection.execute('PRAGMA synchronous=FULL')
+        if skipped:
+            logger.warning(f"Пропущено записей без ключа {columns[0][0]}: {skipped}")
+        return loaded
+
+    def _insert(self, query: str, batch: List[Tuple[Optional[str], ...]]) -> int:
+        count = len(batch)
+        if count:
+            with self.connection:
+                self.connection.executemany(query, batch)
+            batch.clear()
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики найденных и отсутствующих в хранилище ключей."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def normalize_record(table: str, record: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Приводит запись выгрузки или ответа API к столбцам таблицы.
+
+    Returns:
+        Непустые значения столбцов или None, если в записи нет ключа
+    """
+    normalized = {}
+    for column, aliases in TABLES[table]:
+        value = next((record[alias] for alias in aliases if record.get(alias) not in (None, '')), None)
+        if value is not None:
+            normalized[column] = str(value)
+    return normalized if TABLES[table][0][0] in normalized else None
+
+
+def read_export(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Читает записи выгрузки LMS по расширению файла.
+
+    Поддерживаются CSV с заголовком, JSON (массив объектов) и JSON Lines (.jsonl, .ndjson).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            yield from csv.DictReader(f)
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+_store: Optional[EnrichmentStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_enrichment_store() -> Optional[EnrichmentStore]:
+    """Общее хранилище из настройки LMS_ENRICHMENT_STORE (None, если не задано или не открывается)."""
+    global _store, _store_failed
+    path = getattr(settings, 'LMS_ENRICHMENT_STORE', None)
+    if not path or _store_failed:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    _store = EnrichmentStore(path)
+                    logger.info(f"Подключено локальное хранилище данных LMS: {path}")
+                except sqlite3.Error as e:
+                    # Ошибка логируется один раз, дальше данные запрашиваются через API
+                    logger.error(f"Не удалось открыть хранилище данных LMS {path}: {e}")
+                    _store_failed = True
+    return _store
+
+
+def parse_args() -> argparse.Namespace:
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Загрузка выгрузок пользователей и курсов LMS в локальное хранилище xAPI-бриджа"
+    )
+    parser.add_argument('database', help="Файл базы SQLite (создается при отсутствии)")
+    parser.add_argument('table', choices=sorted(TABLES), help="Тип загружаемых данных")
+    parser.add_argument('exports', nargs='+', help="Файлы выгрузки: CSV, JSON или JSON Lines")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Основная функция выполнения."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args()
+
+    store = EnrichmentStore(args.database, readonly=False)
+    try:
+        for export in args.exports:
+            start_time = time.time()
+            loaded = store.load(args.table, read_export(export))
+            logger.info(f"{export}: загружено записей {loaded} за {time.time() - start_time:.2f} сек")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Токен доступа OAuth2 к API Open edX (LMS).
+
+Один токен используется всеми клиентами lms_api. Он запрашивается при
+первом обращении к API, сохраняется на диск (LMS_API_TOKEN_CACHE_FILE)
+и переживает перезапуск процесса, а фоновый поток обновляет его за
+LMS_API_TOKEN_REFRESH_MARGIN секунд до истечения срока действия.
+
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from edx_rest_api_client.client import EdxRestApiClient
+
+from xapi_bridge import constants, settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class AccessTokenProvider:
+    """Получение, кэширование на диске и упреждающее обновление токена доступа."""
+
+    # Запас до истечения срока, при котором токен уже не выдается без обновления (сек)
+    EXPIRY_SKEW = 30
+    # Пауза перед повторной попыткой обновления после ошибки (сек)
+    RETRY_INTERVAL = 60
+
+    def __init__(self, url: str, client_id: str, client_secret: str,
+                 cache_file: Optional[str] = None, refresh_margin: float = 300):
+        """
+        Args:
+            url: URL выдачи токенов OAuth2
+            client_id: Идентификатор OAuth2-клиента
+            client_secret: Секрет OAuth2-клиента
+            cache_file: Файл для хранения токена между перезапусками (None - только в памяти)
+            refresh_margin: За сколько секунд до истечения токен обновляется в фоне
+        """
+        self.url = url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self.token: Optional[str] = None
+        self.expires_at = 0.0  # Unix-время истечения токена
+        self.refresh_at = 0.0  # Unix-время фонового обновления
+        self.lock = threading.Lock()
+        self.refresh_event = threading.Event()
+        self.refresh_thread: Optional[threading.Thread] = None
+
+    def get(self) -> str:
+        """
+        Возвращает действующий токен, при необходимости запрашивая новый.
+
+        Raises:
+            Исключения edx_rest_api_client, если токен получить не удалось
+        """
+        token = self.token
+        if token and time.time() < self.expires_at - self.EXPIRY_SKEW:
+            return token
+
+        with self.lock:
+            if not self.token and self._load():
+                logger.info("Токен доступа к LMS загружен из кэша")
+            if not self.token or time.time() >= self.expires_at - self.EXPIRY_SKEW:
+                self._refresh()
+            self._start_refresh_thread()
+            return self.token
+
+    def _refresh(self) -> None:
+        """Запрос нового токена (вызывается под lock)."""
+        token, expires = EdxRestApiClient.get_oauth_access_token(
+            url=self.url,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+        )
+        self._set_token(token, self._to_timestamp(expires))
+        logger.info(f"Получен токен доступа к LMS, действует до {datetime.datetime.fromtimestamp(self.expires_at)}")
+        self._save()
+        self.refresh_event.set()
+
+    def _set_token(self, token: str, expires_at: float) -> None:
+        """Сохраняет токен; короткоживущие токены обновляются не раньше середины срока."""
+        self.token = token
+        self.expires_at = expires_at
+        self.refresh_at = expires_at - min(self.refresh_margin, (expires_at - time.time()) / 2)
+
+    @staticmethod
+    def _to_timestamp(expires: datetime.datetime) -> float:
+        """edx_rest_api_client возвращает срок действия в UTC без часового пояса."""
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=datetime.timezone.utc)
+        return expires.timestamp()
+
+    def _load(self) -> bool:
+        """Чтение токена из файла кэша, если он выдан тому же клиенту и еще действует."""
+        if not self.cache_file:
+            return False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать кэш токена {self.cache_file}: {e}")
+            return False
+
+        if (cached.get('url') != self.url or cached.get('client_id') != self.client_id
+                or time.time() >= cached.get('expires_at', 0) - self.EXPIRY_SKEW):
+            return False
+        self._set_token(cached['access_token'], cached['expires_at'])
+        return True
+
+    def _save(self) -> None:
+        """Атомарная запись токена в файл кэша, доступный только владельцу."""
+        if not self.cache_file:
+            return
+        data = {
+            'url': self.url,
+            'client_id': self.client_id,
+            'access_token': self.token,
+            'expires_at': self.expires_at,
+        }
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш токена {self.cache_file}: {e}")
+
+    def _start_refresh_thread(self) -> None:
+        """Запуск фонового обновления токена (вызывается под lock)."""
+        if self.refresh_thread is None and self.refresh_margin > 0:
+            self.refresh_thread = threading.Thread(
+                target=self._refresh_loop, name='lms-token-refresh', daemon=True
+            )
+            self.refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        """Обновляет токен в refresh_at, за refresh_margin секунд до истечения срока."""
+        while True:
+            self.refresh_event.clear()
+            delay = self.refresh_at - time.time()
+            # Токен, обновленный синхронно в get(), прерывает ожидание
+            if delay > 0 and self.refresh_event.wait(delay):
+                continue
+            try:
+                with self.lock:
+                    if time.time() >= self.refresh_at:
+                        self._refresh()
+            except Exception as e:
+                logger.warning(f"Ошибка фонового обновления токена доступа к LMS: {e}")
+                time.sleep(min(self.RETRY_INTERVAL, max(self.expires_at - time.time(), 1)))
+
+
+def _create_token_provider() -> AccessTokenProvider:
+    return AccessTokenProvider(
+        url=f"{settings.OPENEDX_PLATFORM_URI}{constants.OPENEDX_OAUTH2_TOKEN_URL}",
+        client_id=settings.OPENEDX_OAUTH2_CLIENT_ID,
+        client_secret=settings.OPENEDX_OAUTH2_CLIENT_SECRET,
+        cache_file=getattr(settings, 'LMS_API_TOKEN_CACHE_FILE', None),
+        refresh_margin=getattr(settings, 'LMS_API_TOKEN_REFRESH_MARGIN', 300),
+    )
+
+
+# Общий токен клиентов lms_api; сетевой запрос выполняется только при первом get()
+token_provider = _create_token_provider()
@@ -1,2 +1,27 @@
 """Support various backend xAPI storage services
 """
+
+import importlib
+
+from xapi_bridge import exceptions
+
+from .base import LRSBackendBase
+
+
+def load_backend(backend_type: str) -> LRSBackendBase:
+    """
+    Создает бэкенд LRS по имени модуля.
+
+    Args:
+        backend_type: Модуль из xapi_bridge.lrs_backends (например, 'learninglocker' или 'generic')
+            или полный путь к модулю с классом LRSBackend
+
+    Raises:
+        XAPIBridgeConfigError: Модуль бэкенда не найден
+    """
+    module_name = backend_type if '.' in backend_type else f'{__name__}.{backend_type}'
+    try:
+        module = importlib.import_module(module_name)
+        return module.LRSBackend()
+    except (ImportError, AttributeError) as e:
+        raise exceptions.XAPIBridgeConfigError(f"Неизвестный тип бэкенда LRS: {backend_type}") from e
@@ -4,7 +4,19 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional, Tuple
+
+
+# Результаты классификации ответа LRS
+RESPONSE_OK = 'ok'
+RESPONSE_UNAUTHORISED = 'unauthorised'
+RESPONSE_STORAGE_ERROR = 'storage_error'
+RESPONSE_SERVER_ERROR = 'server_error'
+RESPONSE_ERROR = 'error'
+
+# Статусы, после которых запрос повторяется, как после ошибки сервера:
+# 408 - истекло ожидание запроса, 429 - превышен лимит запросов
+RETRYABLE_STATUSES = (408, 429)
 
 
 class LRSBackendBase(ABC):
@@ -12,54 +24,87 @@ class LRSBackendBase(ABC):
     Абстрактный базовый класс для реализации бэкендов xAPI LRS.
 
     Определяет обязательные методы для обработки ответов хранилища.
+    Методы получают HTTP-статус и тело ответа, уже разобранное из JSON
+    (None, если тело пустое или не является JSON).
     """
 
+    # Значения Content-Encoding, которые хранилище умеет распаковывать
+    supported_content_encodings: Tuple[str, ...] = ()
+
+    def classify_response(self, status: int, response_data: Any) -> Tuple[str, Optional[int]]:
+        """
+        Определяет тип ответа LRS за один проход.
+
+        Args:
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа
+
+        Returns:
+            Результат (RESPONSE_*) и индекс проблемного высказывания для RESPONSE_STORAGE_ERROR.
+            Статусы RETRYABLE_STATUSES относятся к RESPONSE_SERVER_ERROR: запрос повторяется.
+        """
+        if self.request_unauthorised(status, response_data):
+            return RESPONSE_UNAUTHORISED, None
+        if status in RETRYABLE_STATUSES:
+            return RESPONSE_SERVER_ERROR, None
+        if self.response_has_storage_errors(status, response_data):
+            return RESPONSE_STORAGE_ERROR, self.parse_error_response_for_bad_statement(status, response_data)
+        if status >= 500:
+            return RESPONSE_SERVER_ERROR, None
+        if 200 <= status < 300 and not self.response_has_errors(status, response_data):
+            return RESPONSE_OK, None
+        return RESPONSE_ERROR, None
+
     @abstractmethod
-    def request_unauthorised(self, response_data: Any) -> bool:
+    def request_unauthorised(self, status: int, response_data: Any) -> bool:
         """
         Проверяет наличие ошибки авторизации в ответе.
 
         Args:
-            response_data: Данные ответа от LRS
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа
 
         Returns:
             True если обнаружена ошибка авторизации
         """
 
     @abstractmethod
-    def response_has_errors(self, response_data: Any) -> bool:
+    def response_has_errors(self, status: int, response_data: Any) -> bool:
         """
         Проверяет общее наличие ошибок в ответе.
 
         Args:
-            response_data: Данные ответа от LRS
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа
 
         Returns:
             True если ответ содержит ошибки
         """
 
     @abstractmethod
-    def response_has_storage_errors(self, response_data: Any) -> bool:
+    def response_has_storage_errors(self, status: int, response_data: Any) -> bool:
         """
         Проверяет ошибки хранения данных.
 
         Args:
-            response_data: Данные ответа от LRS
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа
 
         Returns:
             True если есть ошибки сохранения данных
         """
 
     @abstractmethod
-    def parse_error_response_for_bad_statement(self, response_data: Any) -> int:
+    def parse_error_response_for_bad_statement(self, status: int, response_data: Any) -> Optional[int]:
         """
         Идентифицирует индекс некорректного высказывания.
 
         Args:
-            response_data: Данные ответа с ошибкой
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа с ошибкой
 
         Returns:
-            Индекс проблемного высказывания
+            Индекс проблемного высказывания или None, если хранилище его не сообщает
 
         Raises:
             XAPIBridgeLRSBackendResponseParseError: Ошибка парсинга ответа
@@ -0,0 +1,37 @@
+"""
+Бэкенд для LRS, следующих спецификации xAPI 1.0.3 (Ralph, SQL LRS, Veracity и др.).
+
+Ошибки определяются только по HTTP-статусу: формат тела ответа с ошибкой
+спецификацией не задан, поэтому индекс проблемного высказывания неизвестен.
+
+"""
+
+from typing import Any, Optional
+
+from .base import LRSBackendBase
+
+
+class LRSBackend(LRSBackendBase):
+    """Взаимодействие с LRS по кодам ответа спецификации xAPI."""
+
+    # Сжатие тел запросов спецификацией не предусмотрено
+    supported_content_encodings = ()
+
+    def parse_error_response_for_bad_statement(self, status: int, response_data: Any) -> Optional[int]:
+        """Индекс проблемного высказывания спецификацией не сообщается."""
+        return None
+
+    def response_has_errors(self, status: int, response_data: Any) -> bool:
+        """Ошибкой считается любой статус, кроме 2xx."""
+        return not 200 <= status < 300
+
+    def request_unauthorised(self, status: int, response_data: Any) -> bool:
+        """401 - нет авторизации, 403 - нет прав на запись."""
+        return status in (401, 403)
+
+    def response_has_storage_errors(self, status: int, response_data: Any) -> bool:
+        """
+        400 - невалидное высказывание, 409 - конфликт идентификаторов,
+        413 - слишком большой пакет.
+        """
+        return status in (400, 409, 413)
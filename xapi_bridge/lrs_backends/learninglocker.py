@@ -3,9 +3,8 @@
 
 """
 
-import json
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Optional
 
 from .base import LRSBackendBase
 from xapi_bridge import exceptions
@@ -14,12 +13,15 @@ from xapi_bridge import exceptions
 class LRSBackend(LRSBackendBase):
     """Реализация взаимодействия с Learning Locker xAPI LRS."""
 
-    def parse_error_response_for_bad_statement(self, response_data: str) -> Optional[int]:
+    supported_content_encodings = ('gzip', 'deflate')
+
+    def parse_error_response_for_bad_statement(self, status: int, response_data: Any) -> Optional[int]:
         """
         Анализирует ответ LRS для определения индекса некорректного высказывания.
 
         Args:
-            response_data: Ответ от LRS в виде строки JSON
+            status: HTTP-статус ответа
+            response_data: Разобранное тело ответа
 
         Returns:
             Индекс проблемного высказывания или None
@@ -28,8 +30,7 @@ class LRSBackend(LRSBackendBase):
             XAPIBridgeLRSBackendResponseParseError: Ошибка парсинга ответа
         """
         try:
-            error = json.loads(response_data)
-            warnings = error.get('warnings', [])
+            warnings = response_data.get('warnings', [])
 
             if not warnings:
                 return None
@@ -40,31 +41,21 @@ class LRSBackend(LRSBackendBase):
 
             return int(match.group(1)) if match else None
 
-        except (json.JSONDecodeError, KeyError, IndexError, TypeError) as exc:
+        except (AttributeError, KeyError, IndexError, TypeError) as exc:
             raise exceptions.XAPIBridgeLRSBackendResponseParseError(
                 f"Ошибка парсинга ответа LRS: {str(exc)}"
             ) from exc
 
-    def response_has_errors(self, response_data: str) -> bool:
+    def response_has_errors(self, status: int, response_data: Any) -> bool:
         """Проверяет наличие ошибок в ответе LRS."""
-        try:
-            data = json.loads(response_data)
-            return 'errorId' in data
-        except json.JSONDecodeError:
-            return False
+        return isinstance(response_data, dict) and 'errorId' in response_data
 
-    def request_unauthorised(self, response_data: str) -> bool:
+    def request_unauthorised(self, status: int, response_data: Any) -> bool:
         """Проверяет статус авторизации."""
-        try:
-            data = json.loads(response_data)
-            return data.get('message') == 'Unauthorised'
-        except json.JSONDecodeError:
-            return False
+        return status == 401 or (
+            isinstance(response_data, dict) and response_data.get('message') == 'Unauthorised'
+        )
 
-    def response_has_storage_errors(self, response_data: str) -> bool:
+    def response_has_storage_errors(self, status: int, response_data: Any) -> bool:
         """Проверяет наличие ошибок хранения данных."""
-        try:
-            data = json.loads(response_data)
-            return 'warnings' in data
-        except json.JSONDecodeError:
-            return False
+        return isinstance(response_data, dict) and 'warnings' in response_data
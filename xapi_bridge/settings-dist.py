@@ -5,7 +5,7 @@
 """
 
 import os
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 # =============================================
 #  Настройки подключения к LRS
@@ -19,13 +19,56 @@ LRS_USERNAME: Optional[str] = 'your_username'
 LRS_PASSWORD: Optional[str] = 'your_password'
 LRS_BASICAUTH_HASH: Optional[str] = None  # Пример: 'base64_encoded_credentials'
 
+# Таймауты установки соединения и ожидания ответа LRS (сек)
+LRS_CONNECT_TIMEOUT: float = 5
+LRS_READ_TIMEOUT: float = 60
+
 # Authority sign for every LRS-data request
 ORG_NAME = "test_org"
 ORG_EMAIL = "test@test.com"
 
-# Тип бэкенда LRS (например: 'learninglocker')
+# Резервные адреса LRS в порядке приоритета (формат как у LRS_TARGETS). Отправка
+# переключается на первый доступный адрес и возвращается на основной после
+# его восстановления. У целей из LRS_TARGETS резервные адреса задаются ключом 'failover'.
+LRS_FAILOVER_ENDPOINTS: List[Dict[str, Any]] = []
+# Интервал проверки доступности адресов запросом about (сек)
+LRS_HEALTH_CHECK_INTERVAL: float = 10
+# Время ответа на проверку (сек), при превышении которого адрес считается неудачным;
+# это же время служит таймаутом проверки
+LRS_HEALTH_MAX_LATENCY: float = 5.0
+# Количество неудачных (удачных) запросов подряд для переключения адреса
+LRS_HEALTH_THRESHOLD: int = 2
+
+# Дополнительные LRS (например, для аналитики или миграции): имя цели -> параметры
+# подключения endpoint, username, password, basicauth_hash. Каждая цель получает
+# все высказывания и отправляет их независимо от остальных.
+LRS_TARGETS: Dict[str, Dict[str, Any]] = {}
+# Пример:
+# LRS_TARGETS = {
+#     'analytics': {'endpoint': 'https://analytics-lrs.example.org/xapi/', 'basicauth_hash': '...'},
+# }
+
+# Маршрутизация по курсам: префикс идентификатора курса или организация -> имя
+# цели из LRS_TARGETS. События маршрутизированных курсов уходят в свою цель
+# вместо цели по умолчанию, цели из таблицы получают только свои события.
+LRS_ROUTES: Dict[str, str] = {}
+# Пример:
+# LRS_ROUTES = {
+#     'OrgA': 'org_a',
+#     'course-v1:OrgB+Special': 'org_b_special',
+# }
+
+# Тип бэкенда LRS: 'learninglocker', 'generic' (любая LRS по спецификации xAPI 1.0.3)
+# или полный путь к модулю с классом LRSBackend. У целей из LRS_TARGETS - ключ 'backend'
 LRS_BACKEND_TYPE: str = 'learninglocker'
 
+# Сжатие тела запросов к LRS: None, 'gzip' или 'deflate'
+LRS_REQUEST_COMPRESSION: Optional[str] = None
+# Уровень сжатия (1 - быстрее, 9 - компактнее)
+LRS_REQUEST_COMPRESSION_LEVEL: int = 6
+# Тела меньше этого размера (байт) отправляются без сжатия
+LRS_REQUEST_COMPRESSION_MIN_SIZE: int = 1024
+
 # =============================================
 #  Настройки Open edX
 # =============================================
@@ -40,20 +83,63 @@ OPENEDX_OAUTH2_CLIENT_SECRET: str = 'your_client_secret'
 # API Endpoints
 OPENEDX_USER_API_URI: str = f'{OPENEDX_PLATFORM_URI}/api/user/v1/'
 OPENEDX_ENROLLMENT_API_URI: str = f'{OPENEDX_PLATFORM_URI}/api/enrollment/v1/'
+OPENEDX_COURSES_API_URI: str = f'{OPENEDX_PLATFORM_URI}/api/courses/v1/'
 
 # =============================================
 #  Параметры публикации событий
 # =============================================
 
-# Максимальное время ожидания перед отправкой (сек)
-PUBLISH_MAX_WAIT_TIME: int = 60
+# Максимальное время ожидания перед отправкой (сек, допускаются дробные значения)
+PUBLISH_MAX_WAIT_TIME: float = 60
 
 # Максимальный размер пакета для отправки
 PUBLISH_MAX_PAYLOAD: int = 50
 
+# Максимальный размер JSON-тела пакета в байтах (0 - без ограничения)
+PUBLISH_MAX_PAYLOAD_BYTES: int = 1000000
+
 # Максимальное количество попыток отправки
 PUBLISH_MAX_RETRIES: int = 3
 
+# Каталог спула: пакеты цели, которые не помещаются в очередь в памяти или не
+# были приняты LRS после всех попыток, откладываются в файлы и отправляются позже.
+# None - без спула (пакеты сверх PUBLISH_SPOOL_MAX_PENDING остаются в памяти с
+# предупреждением, исчерпание попыток останавливает бридж)
+PUBLISH_SPOOL_DIR: Optional[str] = None
+# Количество высказываний цели, ожидающих отправки в памяти
+PUBLISH_SPOOL_MAX_PENDING: int = 10000
+
+# Линии публикации: у каждой свои пределы пакета и вес в пропускной
+# способности отправки. Типы событий распределяются по линиям в
+# converter.TRACKING_EVENTS_PUBLISH_LANES, остальные идут в линию 'default'
+# с параметрами PUBLISH_MAX_PAYLOAD и PUBLISH_MAX_WAIT_TIME.
+PUBLISH_LANES: Dict[str, Dict[str, Any]] = {
+    'priority': {'max_payload': 10, 'max_wait_time': 1, 'weight': 4},
+}
+
+# Адаптивный режим: размер пакета и интервал отправки подбираются
+# между минимальными значениями и PUBLISH_MAX_PAYLOAD / PUBLISH_MAX_WAIT_TIME
+PUBLISH_ADAPTIVE: bool = False
+PUBLISH_MIN_PAYLOAD: int = 10
+PUBLISH_MIN_WAIT_TIME: float = 1
+# Непрочитанный хвост лога (байт), при котором пакеты достигают максимума
+PUBLISH_ADAPTIVE_LAG_BYTES: int = 1000000
+# Средняя задержка отправки (сек), при которой пакеты достигают максимума
+PUBLISH_ADAPTIVE_LATENCY: float = 2.0
+
+# Проверка высказываний схемой xAPI 1.0.3 перед отправкой (требуется fastjsonschema).
+# Невалидные высказывания не отправляются и записываются в STATEMENT_DEAD_LETTER_FILE
+STATEMENT_VALIDATION: bool = False
+STATEMENT_DEAD_LETTER_FILE: Optional[str] = None  # Пример: '/var/log/xapi/dead_letter.jsonl'
+
+# Агрегация событий просмотра видео: события play/pause/seek/stop_video одного
+# пользователя по одному видео объединяются в одно высказывание на сессию
+VIDEO_SESSION_AGGREGATION: bool = False
+# Время бездействия (сек), после которого сессия просмотра отправляется
+VIDEO_SESSION_IDLE_TIMEOUT: float = 300
+# Максимальное количество одновременно открытых сессий просмотра
+VIDEO_SESSION_MAX_SESSIONS: int = 10000
+
 # =============================================
 #  Настройки кэширования
 # =============================================
@@ -62,6 +148,47 @@ PUBLISH_MAX_RETRIES: int = 3
 LMS_API_USE_MEMCACHED: bool = False
 MEMCACHED_ADDRESS: str = '127.0.0.1:11211'
 
+# Кэш данных LMS в памяти процесса перед Memcached (количество записей на клиент, 0 - отключен)
+LMS_API_LOCAL_CACHE_SIZE: int = 10000
+# Срок жизни закэшированных данных пользователей и курсов (сек)
+LMS_API_USER_CACHE_TTL: float = 300
+LMS_API_COURSE_CACHE_TTL: float = 300
+# Сколько секунд после истечения срока запись кэша в памяти еще выдается, пока она обновляется в фоне
+LMS_API_CACHE_MAX_STALE: float = 600
+# Срок хранения отметки о том, что пользователь или курс не найден в LMS (сек)
+LMS_API_NEGATIVE_CACHE_TTL: float = 60
+# Количество имен в одном пакетном запросе к API учетных записей (0 - только по одному).
+# Пакетный запрос accounts?username=a,b,c требует прав staff у OAuth2-клиента LMS;
+# без них установите 0, иначе каждый пакет завершается ошибкой 403 перед запросами по одному
+LMS_API_USER_BATCH_SIZE: int = 100
+# Интервал перезагрузки каталога курсов в памяти (сек, 0 - каталог не используется).
+# При UNTI_XAPI каталог не используется: в списке курсов нет integrate_2035_id
+LMS_COURSE_CATALOG_REFRESH_INTERVAL: float = 0
+# Количество курсов на странице списка при загрузке каталога
+LMS_COURSE_CATALOG_PAGE_SIZE: int = 100
+# Локальное хранилище SQLite с данными пользователей и курсов из выгрузок LMS
+# (загружается командой python -m xapi_bridge.lms_store; None - не используется)
+LMS_ENRICHMENT_STORE: Optional[str] = None  # Пример: '/var/lib/xapi-bridge/lms.sqlite3'
+# Файл для хранения токена доступа к API LMS между перезапусками (None - только в памяти)
+LMS_API_TOKEN_CACHE_FILE: Optional[str] = None  # Пример: '/var/lib/xapi-bridge/lms-token.json'
+# За сколько секунд до истечения токен обновляется в фоне (0 - только по истечении)
+LMS_API_TOKEN_REFRESH_MARGIN: float = 300
+# Потоки предвыборки данных пользователей и курсов прочитанных событий (0 - синхронно перед конвертацией)
+LMS_API_PREFETCH_WORKERS: int = 4
+# Максимальное количество задач предвыборки в очереди; лишние пропускаются
+LMS_API_PREFETCH_MAX_PENDING: int = 100
+# Сколько секунд обработка хвоста лога ждет предвыборку порции перед конвертацией (0 - не ждать)
+LMS_API_PREFETCH_WAIT: float = 2.0
+# Идентификация actor: 'lms' - email и имя из API пользователей,
+# 'account' - учетная запись на OPENEDX_PLATFORM_URI с id пользователя из события (без запросов к API)
+XAPI_ACTOR_IDENTITY: str = 'lms'
+# Для 'account': событиям без context.user_id подставлять имя пользователя
+# (учетная запись на OPENEDX_PLATFORM_URI/u/, отдельно от идентификаторов); False - пропускать их
+XAPI_ACTOR_USERNAME_FALLBACK: bool = False
+# Данные курса из контекста события без запросов к API курсов. В контексте есть только
+# название текущего блока, а не курса, поэтому активность курса передается без name и description
+XAPI_COURSE_FROM_EVENT: bool = False
+
 # =============================================
 #  Мониторинг и логирование
 # =============================================
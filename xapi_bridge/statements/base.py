@@ -17,7 +17,10 @@ from xapi_bridge import constants, exceptions, lms_api, settings
 class LMSTrackingLogStatement(Statement):
     """Базовый класс для преобразования событий трекинга Open edX в xAPI-высказывания."""
 
-    user_api_client = lms_api.user_api_client
+    @property
+    def user_api_client(self) -> lms_api.UserApiClient:
+        """Общий клиент API пользователей (создается при первом обращении)."""
+        return lms_api.get_user_api_client()
 
     def __init__(self, event: Dict[str, Any], *args, **kwargs):
         """
@@ -75,6 +78,9 @@ class LMSTrackingLogStatement(Statement):
 
     def get_actor(self, event: Dict[str, Any]) -> Optional[Agent]:
         """Создает xAPI Agent на основе данных пользователя."""
+        if getattr(settings, 'XAPI_ACTOR_IDENTITY', 'lms') == 'account':
+            return self.get_account_actor(event)
+
         try:
             username = event.get('username', '')
             if not username:
@@ -106,6 +112,31 @@ class LMSTrackingLogStatement(Statement):
             mbox=f'mailto:{user_info["email"]}',
         )
 
+    def get_account_actor(self, event: Dict[str, Any]) -> Optional[Agent]:
+        """
+        Создает xAPI Agent с учетной записью на платформе из данных события.
+
+        Идентификатор пользователя LMS (context.user_id) используется без
+        обращения к API пользователей. Событиям без идентификатора имя
+        пользователя подставляется, только если включена настройка
+        XAPI_ACTOR_USERNAME_FALLBACK, и с другим home_page: иначе один
+        пользователь оказался бы двумя агентами в одном пространстве имен.
+        """
+        account_name = (event.get('context') or {}).get('user_id')
+        home_page = settings.OPENEDX_PLATFORM_URI
+        if account_name in (None, '') and getattr(settings, 'XAPI_ACTOR_USERNAME_FALLBACK', False):
+            account_name = lms_api.get_event_username(event)
+            home_page = f"{settings.OPENEDX_PLATFORM_URI.rstrip('/')}/u/"
+        if account_name in (None, '', 'anonymous'):
+            return None
+
+        return Agent(
+            account=AgentAccount(
+                name=str(account_name),
+                home_page=home_page
+            )
+        )
+
     def get_context(self, event: Dict[str, Any]) -> Context:
         """Создает контекст xAPI с информацией о платформе."""
         return Context(platform=settings.OPENEDX_PLATFORM_URI)
@@ -17,7 +17,10 @@ from xapi_bridge import constants, lms_api, settings
 class CourseActivityDefinition(ActivityDefinition):
     """Определение активности курса с расширениями для UNTI."""
 
-    enrollment_api_client = lms_api.enrollment_api_client
+    @property
+    def enrollment_api_client(self) -> lms_api.EnrollmentApiClient:
+        """Общий клиент API записей на курсы (создается при первом обращении)."""
+        return lms_api.get_enrollment_api_client()
 
     def __init__(self, event: Dict[str, Any], *args, **kwargs):
         """
@@ -28,11 +31,13 @@ class CourseActivityDefinition(ActivityDefinition):
         """
         course_info = self.enrollment_api_client.get_course_info(event)
 
-        kwargs.update({
-            'type': constants.XAPI_ACTIVITY_COURSE,
-            'name': LanguageMap({'ru-RU': course_info.get('name', 'Курс')}),
-            'description': LanguageMap({'ru-RU': course_info.get('description', '')})
-        })
+        kwargs['type'] = constants.XAPI_ACTIVITY_COURSE
+        # Без названия (данные курса из события, XAPI_COURSE_FROM_EVENT) определение содержит только тип
+        if course_info.get('name'):
+            kwargs.update({
+                'name': LanguageMap({'ru-RU': course_info['name']}),
+                'description': LanguageMap({'ru-RU': course_info.get('description', '')})
+            })
 
         # Добавление расширений для UNTI
         if settings.UNTI_XAPI:
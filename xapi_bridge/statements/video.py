@@ -6,8 +6,9 @@ xAPI Statements and Activities for video interactions in Open edX.
 import datetime
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
+import numpy as np
 from tincan import (
     Activity, ActivityDefinition, ActivityList, Context,
     ContextActivities, Extensions, LanguageMap, Result, Verb
@@ -39,6 +40,57 @@ VIDEO_STATE_CHANGE_VERB_MAP = {
     },
 }
 
+
+def merge_segment_array(segments: Any, length: Optional[float] = None) -> np.ndarray:
+    """
+    Merges played segments into a sorted union with vectorized NumPy operations.
+
+    Args:
+        segments: (start, end) pairs or a flat [start, end, start, end, ...] list, in seconds
+        length: Optional video length to clip the segments to
+
+    Returns:
+        Array of shape (n, 2) with disjoint segments sorted by start
+    """
+    arr = np.asarray(segments, dtype=float).reshape(-1, 2)
+    if length:
+        arr = np.clip(arr, 0, length)
+    arr = arr[arr[:, 1] > arr[:, 0]]
+    if not len(arr):
+        return arr
+
+    arr = arr[np.argsort(arr[:, 0], kind='stable')]
+    # A segment opens a new group when it starts after every previous segment ended
+    reach = np.maximum.accumulate(arr[:, 1])
+    opens = np.empty(len(arr), dtype=bool)
+    opens[0] = True
+    opens[1:] = arr[1:, 0] > reach[:-1]
+    group_starts = np.flatnonzero(opens)
+    return np.column_stack((arr[group_starts, 0], np.maximum.reduceat(arr[:, 1], group_starts)))
+
+
+def merge_segments(segments: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Merges overlapping played segments into a sorted list of disjoint pairs."""
+    segments = list(segments)
+    if not segments:
+        return []
+    return [(float(start), float(end)) for start, end in merge_segment_array(segments)]
+
+
+def format_played_segments(segments: Iterable[Tuple[float, float]]) -> str:
+    """Formats segments as the xAPI video profile played-segments string."""
+    return '[,]'.join(f'{start:.3f}[.]{end:.3f}' for start, end in segments)
+
+
+def get_progress(segments: Any, length: float) -> float:
+    """Share of the video covered by merged segments, from 0 to 1."""
+    if not length or length <= 0 or not len(segments):
+        return 0.0
+    arr = np.asarray(segments, dtype=float).reshape(-1, 2)
+    watched = float(np.sum(arr[:, 1] - arr[:, 0]))
+    return round(min(1.0, watched / length), 3)
+
+
 class VideoStatement(block.BaseCoursewareBlockStatement):
     """Base statement for video interaction events in Open edX."""
 
@@ -150,13 +202,23 @@ class VideoStatement(block.BaseCoursewareBlockStatement):
 class VideoCheckStatement(VideoStatement):
     """Handles video progress check events (problem_check)."""
 
-    def get_object(self, event: Dict[str, Any]) -> Activity:
-        """Constructs activity from problem check data."""
+    def __init__(self, event: Dict[str, Any], *args, **kwargs):
+        # The answer, including the potentially large watch_times list, is decoded once
+        # for get_object and get_result. tincan serializes every instance attribute,
+        # so the decoded data is only kept while the statement is being built.
+        self.__dict__['_check_data'] = self.get_check_data(event)
+        try:
+            super().__init__(event, *args, **kwargs)
+        finally:
+            self.__dict__.pop('_check_data', None)
+
+    def get_check_data(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Decodes the video check answer with title, length and watch_times."""
         event_data = self.get_event_data(event)
         event_type = event['event_type']
         try:
             answer_key = list(event_data['answers'].keys())[0]  # Python 3 dict key handling
-            data = json.loads(json.loads(event_data['answers'][answer_key])['answer'])
+            return json.loads(json.loads(event_data['answers'][answer_key])['answer'])
         except (KeyError, json.JSONDecodeError) as exc:
             logger.error("Invalid video check data: %s", exc)
             raise exceptions.XAPIBridgeSkippedConversion(
@@ -164,6 +226,17 @@ class VideoCheckStatement(VideoStatement):
                 "Invalid video check format"
             ) from exc
 
+    def get_verb(self, event: Dict[str, Any]) -> Verb:
+        """Video checks arrive as problem_check events and are reported as watched."""
+        verb_props = VIDEO_STATE_CHANGE_VERB_MAP['watch_video']
+        return Verb(
+            id=verb_props['id'],
+            display=verb_props['display']
+        )
+
+    def get_object(self, event: Dict[str, Any]) -> Activity:
+        """Constructs activity from problem check data."""
+        data = self._check_data
         return Activity(
             id=self._get_activity_id(event),
             definition=ActivityDefinition(
@@ -177,9 +250,9 @@ class VideoCheckStatement(VideoStatement):
         )
 
     def get_result(self, event: Dict[str, Any]) -> Result:
-        """Constructs graded result."""
+        """Constructs graded result with watched segments and progress."""
         event_data = self.get_event_data(event)
-        return Result(
+        result = Result(
             success=event_data.get('success') == 'correct',
             score={
                 'raw': event_data['grade'],
@@ -189,6 +262,20 @@ class VideoCheckStatement(VideoStatement):
             }
         )
 
+        data = self._check_data
+        watch_times = data.get('watch_times')
+        if watch_times:
+            try:
+                segments = merge_segment_array(watch_times, data.get('video_length'))
+            except (TypeError, ValueError) as exc:
+                logger.warning("Invalid watch_times in video check: %s", exc)
+            else:
+                result.extensions = Extensions({
+                    constants.XAPI_RESULT_VIDEO_PLAYED_SEGMENTS: format_played_segments(segments),
+                    constants.XAPI_RESULT_VIDEO_PROGRESS: get_progress(segments, data.get('video_length', 0)),
+                })
+        return result
+
 
 class VideoSeekStatement(VideoStatement):
     """Handles video seeking events."""
@@ -214,6 +301,29 @@ class VideoCompleteStatement(VideoStatement):
         return result
 
 
+class VideoSessionStatement(VideoStatement):
+    """
+    Summarizes an aggregated viewing session of one video by one learner.
+
+    Built from the last pause_video/stop_video event of the session, with
+    the played segments collected by the aggregator under the
+    ``video_session_segments`` key of the event.
+    """
+
+    def get_result(self, event: Dict[str, Any]) -> Result:
+        """Adds played segments and progress extensions."""
+        result = super().get_result(event)
+        event_data = self.get_event_data(event)
+        segments = merge_segments(event.get('video_session_segments', []))
+        result.completion = event['event_type'].endswith('stop_video')
+        result.extensions = Extensions({
+            constants.XAPI_RESULT_VIDEO_TIME: event_data.get('currentTime', event_data.get('current_time', 0)),
+            constants.XAPI_RESULT_VIDEO_PLAYED_SEGMENTS: format_played_segments(segments),
+            constants.XAPI_RESULT_VIDEO_PROGRESS: get_progress(segments, event_data.get('duration', 0)),
+        })
+        return result
+
+
 class VideoTranscriptStatement(VideoStatement):
     """Handles transcript/captions interactions."""
 
@@ -0,0 +1,291 @@
+"""
+Локальная имитация LRS для замеров производительности и проверки обработки ошибок.
+
+Принимает POST /statements и GET /about, задерживает ответы по выбранному
+распределению, с заданной вероятностью возвращает ошибки сервера, 401
+Unauthorised и ответы Learning Locker с warnings, считает запросы и байты.
+Текущие счетчики доступны по GET /stats.
+
+Пример:
+    python -m xapi_bridge.test.mock_lrs --port 8765 --latency lognormal --latency-mean 0.2 --error-rate 0.05
+
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def _lognormal(rng: random.Random, mean: float, spread: float) -> float:
+    """Логнормальная задержка с заданными средним и стандартным отклонением."""
+    if mean <= 0:
+        return 0.0
+    sigma2 = math.log(1 + (spread / mean) ** 2)
+    return rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+
+# Распределения задержки ответа: (генератор, среднее, разброс в секундах) -> задержка
+LATENCY_DISTRIBUTIONS = {
+    'fixed': lambda rng, mean, spread: mean,
+    'uniform': lambda rng, mean, spread: rng.uniform(mean - spread, mean + spread),
+    'normal': lambda rng, mean, spread: rng.gauss(mean, spread),
+    'exponential': lambda rng, mean, spread: rng.expovariate(1 / mean) if mean > 0 else 0.0,
+    'lognormal': _lognormal,
+}
+
+
+class MockLRSStats:
+    """Счетчики запросов имитации LRS."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.statements = 0  # Принятые высказывания
+        self.bytes_received = 0  # Тела запросов в том виде, как пришли (со сжатием)
+        self.bytes_decoded = 0  # Тела запросов после распаковки
+        self.statuses: Dict[int, int] = {}
+
+    def record(self, status: int, statements: int = 0, received: int = 0, decoded: int = 0) -> None:
+        with self.lock:
+            self.requests += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == 200:
+                self.statements += statements
+            self.bytes_received += received
+            self.bytes_decoded += decoded
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'elapsed': round(elapsed, 3),
+                'requests': self.requests,
+                'statements': self.statements,
+                'statements_per_sec': round(self.statements / elapsed, 1) if elapsed else 0,
+                'bytes_received': self.bytes_received,
+                'bytes_decoded': self.bytes_decoded,
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            }
+
+
+class MockLRSHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов имитации LRS."""
+
+    server: 'MockLRS'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path.endswith('/stats'):
+            self._reply(200, self.server.stats.as_dict(), record=False)
+        elif path.endswith('/about'):
+            self.server.delay()
+            self._reply(200, {'version': ['1.0.3']})
+        else:
+            self._reply(404, {'message': 'Not found'})
+
+    def do_POST(self) -> None:
+        path = self.path.split('?', 1)[0].rstrip('/')
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not path.endswith('/statements'):
+            self._reply(404, {'message': 'Not found'}, received=len(raw))
+            return
+
+        try:
+            body = self._decode(raw)
+            statements = json.loads(body)
+            if isinstance(statements, dict):
+                statements = [statements]
+        except (OSError, zlib.error, ValueError) as e:
+            self._reply(400, {'message': f'Invalid request body: {e}'}, received=len(raw))
+            return
+
+        self.server.delay()
+        status, data = self.server.pick_response(len(statements))
+        self._reply(status, data, statements=len(statements), received=len(raw), decoded=len(body))
+
+    def _decode(self, raw: bytes) -> bytes:
+        encoding = (self.headers.get('Content-Encoding') or '').lower()
+        if encoding == 'gzip':
+            return gzip.decompress(raw)
+        if encoding == 'deflate':
+            return zlib.decompress(raw)
+        return raw
+
+    def _reply(self, status: int, data: Any, record: bool = True, **counters) -> None:
+        payload = json.dumps(data).encode('utf-8')
+        # Счетчики обновляются до ответа, чтобы клиент видел их сразу после получения ответа
+        if record:
+            self.server.stats.record(status, **counters)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-Experience-API-Version', '1.0.3')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.client_address[0], format % args)
+
+
+class MockLRS(ThreadingHTTPServer):
+    """
+    HTTP-сервер имитации LRS.
+
+    Может запускаться из тестов и замеров в фоновом потоке (start/stop)
+    или из командной строки.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, latency: str = 'fixed',
+                 latency_mean: float = 0.0, latency_spread: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, unauthorised_rate: float = 0.0, warning_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            host: Адрес прослушивания
+            port: Порт прослушивания (0 - любой свободный)
+            latency: Распределение задержки ответа из LATENCY_DISTRIBUTIONS
+            latency_mean: Средняя задержка (сек)
+            latency_spread: Разброс задержки (сек)
+            error_rate: Доля ответов с ошибкой сервера
+            error_status: Код ошибки сервера
+            unauthorised_rate: Доля ответов 401 Unauthorised
+            warning_rate: Доля ответов 400 с warnings в формате Learning Locker
+            seed: Начальное значение генератора случайных чисел
+        """
+        super().__init__((host, port), MockLRSHandler)
+        self.latency = LATENCY_DISTRIBUTIONS[latency]
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.unauthorised_rate = unauthorised_rate
+        self.warning_rate = warning_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = MockLRSStats()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """URL имитации для LRS_ENDPOINT."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/xapi/'
+
+    def start(self) -> 'MockLRS':
+        """Запуск сервера в фоновом потоке."""
+        self.thread = threading.Thread(target=self.serve_forever, name='mock-lrs', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Остановка сервера, запущенного через start."""
+        self.shutdown()
+        self.server_close()
+
+    def delay(self) -> None:
+        """Задержка ответа по выбранному распределению."""
+        if self.latency_mean <= 0 and self.latency_spread <= 0:
+            return
+        with self.random_lock:
+            seconds = self.latency(self.random, self.latency_mean, self.latency_spread)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def pick_response(self, count: int):
+        """Выбор ответа на пакет высказываний с учетом вероятностей ошибок."""
+        with self.random_lock:
+            roll = self.random.random()
+            bad_index = self.random.randrange(count) if count else 0
+
+        if roll < self.unauthorised_rate:
+            return 401, {'message': 'Unauthorised'}
+        roll -= self.unauthorised_rate
+        if roll < self.error_rate:
+            return self.error_status, {'message': 'Injected server error'}
+        roll -= self.error_rate
+        if roll < self.warning_rate:
+            return 400, {
+                'errorId': str(uuid.uuid4()),
+                'warnings': [f"Problem in 'statements.{bad_index}.actor': Expected an Agent or Group"],
+                'message': 'Invalid statement',
+            }
+        return 200, [str(uuid.uuid4()) for _ in range(count)]
+
+
+def parse_args() -> argparse.Namespace:
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Имитация LRS для замеров и проверки обработки ошибок xAPI-бриджа"
+    )
+    parser.add_argument('--host', default='127.0.0.1', help="Адрес прослушивания")
+    parser.add_argument('-p', '--port', type=int, default=8765, help="Порт прослушивания")
+    parser.add_argument(
+        '--latency', choices=sorted(LATENCY_DISTRIBUTIONS), default='fixed',
+        help="Распределение задержки ответа"
+    )
+    parser.add_argument('--latency-mean', type=float, default=0.0, help="Средняя задержка ответа (сек)")
+    parser.add_argument('--latency-spread', type=float, default=0.0, help="Разброс задержки ответа (сек)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов с ошибкой сервера")
+    parser.add_argument('--error-status', type=int, default=503, help="Код ошибки сервера")
+    parser.add_argument('--unauthorised-rate', type=float, default=0.0, help="Доля ответов 401 Unauthorised")
+    parser.add_argument(
+        '--warning-rate', type=float, default=0.0,
+        help="Доля ответов 400 с warnings и индексом некорректного высказывания (Learning Locker)"
+    )
+    parser.add_argument('--seed', type=int, help="Начальное значение генератора случайных чисел")
+    parser.add_argument(
+        '--report-interval', type=float, default=10,
+        help="Интервал вывода счетчиков в лог (сек, 0 - только при завершении)"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Основная функция выполнения."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args()
+
+    server = MockLRS(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        unauthorised_rate=args.unauthorised_rate,
+        warning_rate=args.warning_rate,
+        seed=args.seed,
+    ).start()
+    logger.info(f"Имитация LRS запущена: {server.endpoint}")
+
+    try:
+        while True:
+            time.sleep(args.report_interval or 3600)
+            if args.report_interval:
+                logger.info(f"Счетчики: {json.dumps(server.stats.as_dict())}")
+    except KeyboardInterrupt:
+        logger.info("Остановка имитации LRS")
+    finally:
+        server.stop()
+        logger.info(f"Итоговые счетчики: {json.dumps(server.stats.as_dict())}")
+
+
+if __name__ == '__main__':
+    main()
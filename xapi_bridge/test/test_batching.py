@@ -0,0 +1,131 @@
+"""
+Тесты адаптивного размера пакетов отправки.
+
+"""
+
+import threading
+import time
+import unittest
+from typing import List
+from unittest import mock
+
+from xapi_bridge import client, settings
+from xapi_bridge.__main__ import QueueManager
+from xapi_bridge.batching import AdaptiveBatchTuner, WeightedFairGate
+
+
+ADAPTIVE_SETTINGS = {
+    'PUBLISH_ADAPTIVE': True,
+    'PUBLISH_MAX_PAYLOAD': 100,
+    'PUBLISH_MIN_PAYLOAD': 5,
+    'PUBLISH_MAX_WAIT_TIME': 60,
+    'PUBLISH_MIN_WAIT_TIME': 30,
+    'PUBLISH_MAX_PAYLOAD_BYTES': 0,
+    'PUBLISH_SPOOL_DIR': None,
+}
+
+
+class RecordingPublisher:
+    """Публикатор, запоминающий размеры отправленных пакетов."""
+
+    def __init__(self):
+        self.batches: List[int] = []
+        self.published = threading.Event()
+
+    def publish_statements(self, statements: List[bytes]) -> None:
+        self.batches.append(len(statements))
+        self.published.set()
+
+
+class AdaptiveBatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [mock.patch.object(settings, name, value, create=True) for name, value in ADAPTIVE_SETTINGS.items()]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_idle_tuner_uses_minimum_batch(self):
+        tuner = AdaptiveBatchTuner()
+        self.assertEqual(tuner.max_payload_size, 5)
+        self.assertEqual(tuner.max_wait_time_secs, 30)
+
+    def test_pending_backlog_grows_batch(self):
+        tuner = AdaptiveBatchTuner()
+        tuner.observe_queue_depth(100)
+        self.assertEqual(tuner.max_payload_size, 100)
+
+    def test_idle_queue_seals_at_minimum_size(self):
+        publisher = RecordingPublisher()
+        with mock.patch.dict(client.lrs_publishers, {client.DEFAULT_LRS_TARGET: publisher}):
+            queue = QueueManager()
+            self.addCleanup(queue.close)
+            for i in range(5):
+                queue.push(b'{"id": "%d"}' % i)
+            self.assertTrue(publisher.published.wait(5))
+        self.assertEqual(publisher.batches, [5])
+        self.assertEqual(queue.cache_bytes, 0)
+
+
+class WeightedFairGateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = WeightedFairGate()
+        self.order: List[str] = []
+        self.threads: List[threading.Thread] = []
+
+    def send(self, lane: str, weight: float, cost: int = 4) -> None:
+        """Ставит пакет линии в очередь и ждет, пока он займет место среди ожидающих."""
+        def run():
+            with self.gate.slot(lane, weight, cost):
+                self.order.append(lane)
+
+        waiting = len(self.gate.waiting)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        deadline = time.monotonic() + 5
+        while len(self.gate.waiting) == waiting and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def release(self, holder: threading.Event) -> str:
+        holder.set()
+        for thread in self.threads:
+            thread.join(5)
+        return ''.join(self.order)
+
+    def hold(self) -> threading.Event:
+        """Занимает единственное место, пока тест не отпустит его."""
+        holder, acquired = threading.Event(), threading.Event()
+
+        def run():
+            with self.gate.slot('hold', 1, 0):
+                acquired.set()
+                holder.wait(5)
+
+        threading.Thread(target=run, daemon=True).start()
+        self.assertTrue(acquired.wait(5))
+        return holder
+
+    def test_busy_lanes_share_by_weight(self):
+        holder = self.hold()
+        for _ in range(2):
+            self.send('B', 1)
+        for _ in range(6):
+            self.send('A', 4)
+        self.assertEqual(self.release(holder), 'AAABAAAB')
+
+    def test_idle_lane_does_not_bank_credit(self):
+        for _ in range(3):
+            with self.gate.slot('A', 4, 4):
+                pass
+        holder = self.hold()
+        self.send('B', 1)
+        for _ in range(3):
+            self.send('A', 4)
+        # Без учета виртуального времени простаивавшая линия B прошла бы вперед A
+        self.assertEqual(self.release(holder), 'AABA')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Тесты отправки высказываний в LRS на имитации mock_lrs.
+
+"""
+
+import socket
+import unittest
+from unittest import mock
+
+from xapi_bridge import client, exceptions, settings
+from xapi_bridge.test.mock_lrs import MockLRS
+
+
+STATEMENTS = [b'{"id": "1"}', b'{"id": "2"}', b'{"id": "3"}']
+
+
+def closed_endpoint() -> str:
+    """Адрес, на котором никто не принимает соединения."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/xapi/'
+
+
+class PublisherTest(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [
+            mock.patch.object(settings, 'LRS_REQUEST_COMPRESSION', None, create=True),
+            mock.patch.object(settings, 'LRS_HEALTH_THRESHOLD', 2, create=True),
+            # Фоновые проверки не должны вмешиваться в результаты отправки
+            mock.patch.object(settings, 'LRS_HEALTH_CHECK_INTERVAL', 3600, create=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def start_lrs(self, **kwargs) -> MockLRS:
+        lrs = MockLRS(port=0, seed=1, **kwargs).start()
+        self.addCleanup(lrs.stop)
+        return lrs
+
+    def publisher(self, lrs: MockLRS, backend: str = 'generic', **config) -> client.XAPIBridgeLRSPublisher:
+        return client.XAPIBridgeLRSPublisher('test', dict(config, endpoint=lrs.endpoint, backend=backend))
+
+    def test_publishes_batch(self):
+        lrs = self.start_lrs()
+        response = self.publisher(lrs).publish_statements(STATEMENTS)
+
+        self.assertTrue(response.success)
+        self.assertEqual(lrs.stats.statements, 3)
+
+    def test_server_error_is_connection_error(self):
+        lrs = self.start_lrs(error_rate=1.0, error_status=503)
+        with self.assertRaises(exceptions.XAPIBridgeLRSConnectionError) as raised:
+            self.publisher(lrs).publish_statements(STATEMENTS)
+        self.assertEqual(raised.exception.context['status_code'], 503)
+
+    def test_throttling_is_connection_error(self):
+        lrs = self.start_lrs(error_rate=1.0, error_status=429)
+        with self.assertRaises(exceptions.XAPIBridgeLRSConnectionError):
+            self.publisher(lrs).publish_statements(STATEMENTS)
+
+    def test_unauthorised_is_connection_error(self):
+        lrs = self.start_lrs(unauthorised_rate=1.0)
+        with self.assertRaises(exceptions.XAPIBridgeLRSConnectionError) as raised:
+            self.publisher(lrs, backend='learninglocker').publish_statements(STATEMENTS)
+        self.assertEqual(raised.exception.context['status_code'], 401)
+
+    def test_learninglocker_warning_names_bad_statement(self):
+        lrs = self.start_lrs(warning_rate=1.0)
+        with self.assertRaises(exceptions.XAPIBridgeStatementError) as raised:
+            self.publisher(lrs, backend='learninglocker').publish_statements(STATEMENTS)
+        self.assertIn(raised.exception.statement, STATEMENTS)
+
+    def test_unclassified_client_error_is_not_dropped(self):
+        lrs = self.start_lrs(error_rate=1.0, error_status=404)
+        with self.assertRaises(exceptions.XAPIBridgeStatementError) as raised:
+            self.publisher(lrs).publish_statements(STATEMENTS)
+        self.assertIsNone(raised.exception.statement)
+
+    def test_fails_over_to_backup_and_back(self):
+        backup = self.start_lrs()
+        publisher = client.XAPIBridgeLRSPublisher('test', {
+            'endpoint': closed_endpoint(),
+            'backend': 'generic',
+            'failover': [{'endpoint': backup.endpoint}],
+        })
+        primary = publisher.endpoints[0]
+
+        # Неудачи отправки и проверок about основного адреса учитываются вместе,
+        # поэтому переключение происходит не позже LRS_HEALTH_THRESHOLD попыток
+        for _ in range(3):
+            try:
+                response = publisher.publish_statements(STATEMENTS)
+                break
+            except exceptions.XAPIBridgeLRSConnectionError:
+                continue
+        else:
+            self.fail('Отправка не переключилась на резервный адрес')
+
+        self.assertTrue(response.success)
+        self.assertFalse(primary.healthy)
+        self.assertEqual(publisher.endpoint, backup.endpoint)
+        self.assertEqual(backup.stats.statements, 3)
+
+        # Основной адрес возвращается после LRS_HEALTH_THRESHOLD удачных проверок
+        for _ in range(2):
+            primary.record(True)
+        self.assertIs(publisher.active_endpoint, primary)
+
+    def test_slow_probe_marks_endpoint_unhealthy(self):
+        lrs = self.start_lrs(latency_mean=0.3)
+        with mock.patch.object(settings, 'LRS_HEALTH_MAX_LATENCY', 0.1, create=True):
+            endpoint = client.LRSEndpoint({'endpoint': lrs.endpoint})
+            for _ in range(2):
+                endpoint.probe()
+        self.assertFalse(endpoint.healthy)
+
+
+class SplitBatchesTest(unittest.TestCase):
+
+    def test_splits_by_count(self):
+        payloads = [b'{}'] * 5
+        self.assertEqual([len(batch) for batch in client.split_batches(payloads, 2)], [2, 2, 1])
+
+    def test_splits_by_body_size(self):
+        # Тело пакета из двух высказываний: [, 10 + 1 + 10 байт, ] = 23 байта
+        payloads = [b'x' * 10] * 3
+        self.assertEqual([len(batch) for batch in client.split_batches(payloads, 10, 23)], [2, 1])
+
+    def test_oversized_statement_gets_own_batch(self):
+        payloads = [b'x' * 50, b'y']
+        self.assertEqual(list(client.split_batches(payloads, 10, 20)), [[b'x' * 50], [b'y']])
+
+
+class RouteTargetTest(unittest.TestCase):
+
+    ROUTES = {'course-v1:OrgA+Special': 'special', 'OrgA': 'org_a', 'OrgB': 'org_b'}
+
+    def setUp(self):
+        patcher = mock.patch.object(settings, 'LRS_ROUTES', self.ROUTES, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client.get_route_target.cache_clear()
+        self.addCleanup(client.get_route_target.cache_clear)
+
+    def test_longest_prefix_wins(self):
+        self.assertEqual(client.get_route_target('course-v1:OrgA+Special+2024'), 'special')
+
+    def test_falls_back_to_organisation(self):
+        self.assertEqual(client.get_route_target('course-v1:OrgA+Other+2024'), 'org_a')
+        self.assertEqual(client.get_route_target('OrgB/Old/2014'), 'org_b')
+
+    def test_unrouted_course(self):
+        self.assertIsNone(client.get_route_target('course-v1:OrgC+X+1'))
+
+    def test_event_targets(self):
+        publishers = dict.fromkeys((client.DEFAULT_LRS_TARGET, 'org_a', 'archive'))
+        with mock.patch.dict(client.lrs_publishers, publishers, clear=True):
+            routed = client.get_event_targets({'context': {'course_id': 'course-v1:OrgA+Other+2024'}})
+            unrouted = client.get_event_targets({'context': {'course_id': 'course-v1:OrgC+X+1'}})
+            # Цель special не настроена, события ее курсов уходят в цель по умолчанию
+            unconfigured = client.get_event_targets({'context': {'course_id': 'course-v1:OrgA+Special+1'}})
+        self.assertEqual(routed, ('org_a', 'archive'))
+        self.assertEqual(unrouted, (client.DEFAULT_LRS_TARGET, 'archive'))
+        self.assertEqual(unconfigured, (client.DEFAULT_LRS_TARGET, 'archive'))
+
+
+if __name__ == '__main__':
+    unittest.main()
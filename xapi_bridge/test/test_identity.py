@@ -0,0 +1,81 @@
+"""
+Тесты построения высказываний только из данных события, без запросов к LMS.
+
+"""
+
+import unittest
+from unittest import mock
+
+from xapi_bridge import converter, lms_api, settings
+
+
+def enrollment_event(**context):
+    """Событие записи на курс с сервера LMS."""
+    return {
+        'event_type': 'edx.course.enrollment.activated',
+        'event_source': 'server',
+        'username': 'learner',
+        'time': '2024-01-01T00:00:00+00:00',
+        'event': {'course_id': 'course-v1:Org+C+R', 'mode': 'audit'},
+        'context': dict({
+            'course_id': 'course-v1:Org+C+R',
+            'user_id': 7,
+            'module': {'display_name': 'Unit 1'},
+        }, **context),
+    }
+
+
+@mock.patch.object(settings, 'XAPI_COURSE_FROM_EVENT', True, create=True)
+@mock.patch.object(settings, 'XAPI_ACTOR_IDENTITY', 'account', create=True)
+class EventIdentityTest(unittest.TestCase):
+
+    def setUp(self):
+        # Любое обращение к API LMS в этом режиме - ошибка
+        patcher = mock.patch.object(lms_api, 'get_user_api_client', side_effect=AssertionError('LMS API used'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def convert(self, event):
+        statements = converter.to_xapi(event)
+        self.assertIsNotNone(statements)
+        return statements[0]
+
+    def test_actor_is_platform_account(self):
+        statement = self.convert(enrollment_event())
+        self.assertEqual(statement.actor.account.name, '7')
+        self.assertEqual(statement.actor.account.home_page, settings.OPENEDX_PLATFORM_URI)
+        self.assertIsNone(statement.actor.mbox)
+
+    def test_course_definition_has_no_block_name(self):
+        statement = self.convert(enrollment_event())
+        self.assertIsNone(statement.object.definition.name)
+        self.assertIsNone(statement.object.definition.description)
+
+    def test_event_without_user_id_has_no_actor(self):
+        self.assertIsNone(self.convert(enrollment_event(user_id=None)).actor)
+
+    @mock.patch.object(settings, 'XAPI_ACTOR_USERNAME_FALLBACK', True, create=True)
+    def test_username_fallback_uses_own_namespace(self):
+        statement = self.convert(enrollment_event(user_id=None))
+        self.assertEqual(statement.actor.account.name, 'learner')
+        self.assertEqual(statement.actor.account.home_page, f"{settings.OPENEDX_PLATFORM_URI.rstrip('/')}/u/")
+
+    @mock.patch.object(settings, 'XAPI_ACTOR_USERNAME_FALLBACK', True, create=True)
+    def test_anonymous_fallback_has_no_actor(self):
+        event = enrollment_event(user_id=None)
+        event['username'] = 'anonymous'
+        self.assertIsNone(self.convert(event).actor)
+
+    def test_prefetch_makes_no_requests(self):
+        with mock.patch.object(lms_api, 'get_enrollment_api_client') as enrollment_client:
+            lms_api.prefetch_enrichment([enrollment_event()])
+        enrollment_client.assert_not_called()
+
+    @mock.patch.object(settings, 'UNTI_XAPI', True)
+    def test_unti_course_id_comes_from_event(self):
+        course_data = lms_api.EnrollmentApiClient._event_course_data({'2035_id': ' 123 '})
+        self.assertEqual(course_data, {'2035_id': '123'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Тесты кэша данных LMS в памяти процесса.
+
+"""
+
+import pickle
+import threading
+import time
+import unittest
+from unittest import mock
+
+from edx_rest_api_client.exceptions import HttpNotFoundError
+from pymemcache import serde
+
+from xapi_bridge import exceptions, lms_api, settings
+from xapi_bridge.lms_cache import NEGATIVE, LocalCache, SingleFlight
+
+
+class FakeClock:
+    """Управляемая замена time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def user_api_client(test: unittest.TestCase, api: mock.Mock) -> lms_api.UserApiClient:
+    """Клиент API пользователей без memcached с подмененным клиентом edX REST API."""
+    patcher = mock.patch.object(lms_api.lms_token.token_provider, 'get', return_value='token')
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    with mock.patch.object(settings, 'LMS_API_USE_MEMCACHED', False):
+        user_client = lms_api.UserApiClient()
+    user_client._client_token = 'token'
+    user_client._client = api
+    return user_client
+
+
+class LocalCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('xapi_bridge.lms_cache.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_expires_after_ttl(self):
+        cache = LocalCache(max_size=10, ttl=60)
+        cache.set('user', {'name': 'learner'})
+        self.clock.now += 59
+        self.assertEqual(cache.get('user'), {'name': 'learner'})
+        self.clock.now += 1
+        self.assertIsNone(cache.get('user'))
+        self.assertEqual(cache.stats(), {'size': 0, 'hits': 1, 'stale_hits': 0, 'misses': 1})
+
+    def test_entry_ttl_overrides_default(self):
+        cache = LocalCache(max_size=10, ttl=60)
+        cache.set('user', 'short', ttl=5)
+        self.clock.now += 5
+        self.assertIsNone(cache.get('user'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LocalCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = LocalCache(max_size=0, ttl=60)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+
+class StaleWhileRevalidateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('xapi_bridge.lms_cache.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stale_entry_is_served_within_max_stale(self):
+        cache = LocalCache(max_size=10, ttl=60, max_stale=100)
+        cache.set('user', 'old')
+        self.clock.now += 120
+        self.assertEqual(cache.lookup('user'), ('old', True))
+        self.assertIsNone(cache.get('user'))
+        self.clock.now += 40
+        self.assertEqual(cache.lookup('user'), (None, False))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_stale_user_is_returned_and_refreshed_in_background(self):
+        api = mock.Mock()
+        api.accounts.return_value.get.return_value = {'email': 'new@example.org', 'name': 'New'}
+        with mock.patch.object(settings, 'LMS_API_CACHE_MAX_STALE', 600, create=True):
+            user_client = user_api_client(self, api)
+        user_client._cache_set('user_api_user_learner', {'email': 'old@example.org', 'fullname': 'Old'})
+        self.clock.now += user_client.cache_ttl + 1
+
+        self.assertEqual(user_client.get_edx_user_info('learner')['email'], 'old@example.org')
+        user_client.revalidate_executor.shutdown(wait=True)
+        self.assertEqual(user_client.get_edx_user_info('learner')['email'], 'new@example.org')
+        self.assertEqual(api.accounts.return_value.get.call_count, 1)
+        self.assertEqual(user_client.cache_stats()['revalidations'], 1)
+
+    def test_negative_entry_is_not_served_stale(self):
+        api = mock.Mock()
+        api.accounts.return_value.get.return_value = {'email': 'learner@example.org', 'name': 'Learner'}
+        user_client = user_api_client(self, api)
+        user_client._cache_set_negative('user_api_user_learner')
+        self.clock.now += user_client.negative_ttl + 1
+
+        self.assertEqual(user_client.get_edx_user_info('learner')['email'], 'learner@example.org')
+        self.assertIsNone(user_client.revalidate_executor)
+
+
+class NegativeCacheTest(unittest.TestCase):
+
+    def test_negative_survives_memcached_pickling(self):
+        self.assertIs(pickle.loads(pickle.dumps(NEGATIVE)), NEGATIVE)
+        value, flags = serde.pickle_serde.serialize('key', NEGATIVE)
+        self.assertIs(serde.pickle_serde.deserialize('key', value, flags), NEGATIVE)
+
+    def test_missing_user_is_requested_once(self):
+        api = mock.Mock()
+        api.accounts.return_value.get.side_effect = HttpNotFoundError('Not found')
+        user_client = user_api_client(self, api)
+
+        for _ in range(3):
+            with self.assertRaises(exceptions.XAPIBridgeUserNotFoundError):
+                user_client.get_edx_user_info('ghost')
+        self.assertEqual(api.accounts.return_value.get.call_count, 1)
+        self.assertEqual(user_client.cache_stats()['negative_hits'], 2)
+
+    def test_anonymous_user_is_not_requested(self):
+        api = mock.Mock()
+        user_client = user_api_client(self, api)
+        with self.assertRaises(exceptions.XAPIBridgeUserNotFoundError):
+            user_client.get_edx_user_info('anonymous')
+        api.accounts.assert_not_called()
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_fetch(self):
+        self.calls += 1
+        self.release.wait(5)
+        return {'name': 'learner'}
+
+    def run_waiters(self, count: int, fetch) -> list:
+        """Запускает count потоков за ключом и ждет, пока все они встанут в очередь."""
+        results = []
+
+        def run():
+            try:
+                results.append(self.flight.do('key', fetch))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.flight.coalesced < count - 1 or 'key' not in self.flight.flights:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_lookups_share_one_fetch(self):
+        results = self.run_waiters(4, self.slow_fetch)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'name': 'learner'}] * 4)
+        self.assertEqual(self.flight.flights, {})
+
+    def test_error_is_shared_by_waiters(self):
+        def failing_fetch():
+            self.release.wait(5)
+            raise ValueError('LMS unavailable')
+
+        results = self.run_waiters(3, failing_fetch)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_unresolved_claim_makes_waiter_fetch(self):
+        self.assertEqual(self.flight.claim(['key', 'other']), ['key', 'other'])
+        self.assertEqual(self.flight.claim(['key']), [])
+
+        # Завершенный ключ больше не заявлен, следующий запрос выполняется заново
+        self.flight.resolve('other', {'name': 'batch'})
+        self.assertEqual(self.flight.do('other', lambda: {'name': 'fresh'}), {'name': 'fresh'})
+
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(self.flight.do('key', self.slow_fetch)), daemon=True)
+        waiter.start()
+        while not self.flight.coalesced:
+            time.sleep(0.001)
+        self.release.set()
+        # Пакетный запрос не нашел ключ - ожидающий поток запрашивает его сам
+        self.flight.resolve('key')
+        waiter.join(5)
+        self.assertEqual(result, [{'name': 'learner'}])
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
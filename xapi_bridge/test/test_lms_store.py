@@ -0,0 +1,141 @@
+"""
+Тесты локального хранилища данных пользователей и курсов LMS.
+
+"""
+
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from xapi_bridge import lms_store, settings
+from xapi_bridge.lms_store import EnrichmentStore, normalize_record, read_export
+from xapi_bridge.test.test_lms_cache import user_api_client
+
+
+class NormalizeRecordTest(unittest.TestCase):
+
+    def test_user_aliases(self):
+        record = {'username': 'learner', 'email': 'learner@example.org', 'full_name': 'Learner', 'unti_id': 42}
+        self.assertEqual(normalize_record('users', record), {
+            'username': 'learner', 'email': 'learner@example.org', 'name': 'Learner', 'unti_id': '42',
+        })
+
+    def test_course_aliases_and_empty_values(self):
+        record = {'id': 'course-v1:Org+C+R', 'course_name': '', 'display_name': 'Course', '2035_id': None}
+        self.assertEqual(normalize_record('courses', record), {
+            'course_id': 'course-v1:Org+C+R', 'course_name': 'Course',
+        })
+
+    def test_record_without_key_is_skipped(self):
+        self.assertIsNone(normalize_record('users', {'email': 'learner@example.org'}))
+
+
+class EnrichmentStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def create_store(self, name: str = 'lms.sqlite3') -> str:
+        path = os.path.join(self.tmp_dir, name)
+        store = EnrichmentStore(path, readonly=False)
+        loaded = store.load('users', [
+            {'username': 'learner', 'email': 'learner@example.org', 'fullname': 'Learner'},
+            {'username': 'other', 'email': 'other@example.org'},
+            {'email': 'no-key@example.org'},
+        ])
+        store.close()
+        self.assertEqual(loaded, 2)
+        return path
+
+    def open_store(self, path: str) -> EnrichmentStore:
+        store = EnrichmentStore(path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_get_many_returns_loaded_records(self):
+        store = self.open_store(self.create_store())
+        found = store.get_many('users', ['learner', 'other', 'missing', 'learner', ''])
+        self.assertEqual(found, {
+            'learner': {'username': 'learner', 'email': 'learner@example.org', 'name': 'Learner'},
+            'other': {'username': 'other', 'email': 'other@example.org'},
+        })
+        self.assertEqual(store.stats(), {'hits': 2, 'misses': 1})
+
+    def test_reload_replaces_records(self):
+        path = self.create_store()
+        store = EnrichmentStore(path, readonly=False)
+        store.load('users', [{'username': 'learner', 'email': 'new@example.org'}])
+        store.close()
+        self.assertEqual(self.open_store(path).get_many('users', ['learner'])['learner']['email'], 'new@example.org')
+
+    def test_store_is_opened_read_only(self):
+        store = self.open_store(self.create_store())
+        with self.assertRaises(sqlite3.OperationalError):
+            store.load('users', [{'username': 'learner', 'email': 'new@example.org'}])
+
+    def test_path_with_uri_characters(self):
+        path = self.create_store('lms?mode=rwc#1%20.sqlite3')
+        store = self.open_store(path)
+        self.assertIn('learner', store.get_many('users', ['learner']))
+        self.assertEqual(os.listdir(self.tmp_dir), ['lms?mode=rwc#1%20.sqlite3'])
+
+    def test_missing_file_is_not_created(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            EnrichmentStore(os.path.join(self.tmp_dir, 'missing.sqlite3'))
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_user_client_reads_store_before_api(self):
+        path = self.create_store()
+        api = mock.Mock()
+        with mock.patch.object(settings, 'LMS_ENRICHMENT_STORE', path, create=True), \
+                mock.patch.object(lms_store, '_store', None), mock.patch.object(lms_store, '_store_failed', False):
+            user_client = user_api_client(self, api)
+            user_data = user_client.get_edx_user_info('learner')
+            resolved = user_client.resolve_users(['other'])
+            lms_store._store.close()
+        self.assertEqual(user_data['email'], 'learner@example.org')
+        self.assertEqual(user_data['fullname'], 'Learner')
+        self.assertEqual(resolved['other']['email'], 'other@example.org')
+        api.accounts.assert_not_called()
+
+
+class ReadExportTest(unittest.TestCase):
+
+    RECORDS = [{'username': 'learner', 'email': 'learner@example.org'}, {'username': 'other', 'email': ''}]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def export_path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir, name)
+
+    def test_csv(self):
+        path = self.export_path('users.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['username', 'email'])
+            writer.writeheader()
+            writer.writerows(self.RECORDS)
+        self.assertEqual(list(read_export(path)), self.RECORDS)
+
+    def test_json_lines(self):
+        path = self.export_path('users.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(json.dumps(record) for record in self.RECORDS) + '\n\n')
+        self.assertEqual(list(read_export(path)), self.RECORDS)
+
+    def test_json(self):
+        path = self.export_path('users.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.RECORDS, f)
+        self.assertEqual(list(read_export(path)), self.RECORDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Тесты получения, кэширования и обновления токена доступа к LMS.
+
+"""
+
+import datetime
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from typing import Optional
+from unittest import mock
+
+from xapi_bridge.lms_token import AccessTokenProvider
+
+
+NOW = 1_700_000_000.0
+
+
+def expiring_in(seconds: float) -> datetime.datetime:
+    """Срок действия в том виде, в каком его возвращает edx_rest_api_client (UTC без пояса)."""
+    return datetime.datetime.fromtimestamp(NOW + seconds, datetime.timezone.utc).replace(tzinfo=None)
+
+
+class AccessTokenProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = NOW
+        patcher = mock.patch('xapi_bridge.lms_token.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.tokens = iter(['token-1', 'token-2', 'token-3'])
+        patcher = mock.patch(
+            'xapi_bridge.lms_token.EdxRestApiClient.get_oauth_access_token',
+            side_effect=lambda **kwargs: (next(self.tokens), expiring_in(3600)),
+        )
+        self.get_oauth_access_token = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.cache_file = os.path.join(tmp_dir, 'token.json')
+
+    def provider(self, client_id: str = 'bridge', cache_file: Optional[str] = None) -> AccessTokenProvider:
+        # Без фонового обновления: токен обновляется только в get()
+        return AccessTokenProvider('https://lms/oauth2/access_token', client_id, 'secret',
+                                   cache_file=cache_file, refresh_margin=0)
+
+    def test_token_is_reused_until_expiry(self):
+        provider = self.provider()
+        self.assertEqual(provider.get(), 'token-1')
+        self.now += 3600 - AccessTokenProvider.EXPIRY_SKEW - 1
+        self.assertEqual(provider.get(), 'token-1')
+        self.now += 1
+        self.assertEqual(provider.get(), 'token-2')
+        self.assertEqual(self.get_oauth_access_token.call_count, 2)
+
+    def test_naive_expiry_is_utc(self):
+        provider = self.provider()
+        provider.get()
+        self.assertEqual(provider.expires_at, NOW + 3600)
+
+    def test_short_lived_token_is_refreshed_at_half_life(self):
+        provider = AccessTokenProvider('https://lms/oauth2/access_token', 'bridge', 'secret', refresh_margin=300)
+        provider._set_token('token', NOW + 200)
+        self.assertEqual(provider.refresh_at, NOW + 100)
+        provider._set_token('token', NOW + 3600)
+        self.assertEqual(provider.refresh_at, NOW + 3300)
+
+    def test_cached_token_survives_restart(self):
+        self.assertEqual(self.provider(cache_file=self.cache_file).get(), 'token-1')
+        self.assertEqual(stat.S_IMODE(os.stat(self.cache_file).st_mode), 0o600)
+
+        self.assertEqual(self.provider(cache_file=self.cache_file).get(), 'token-1')
+        self.assertEqual(self.get_oauth_access_token.call_count, 1)
+
+    def test_cached_token_of_other_client_is_ignored(self):
+        self.provider(cache_file=self.cache_file).get()
+        self.assertEqual(self.provider('other', cache_file=self.cache_file).get(), 'token-2')
+
+    def test_expired_cached_token_is_ignored(self):
+        with open(self.cache_file, 'w') as f:
+            json.dump({
+                'url': 'https://lms/oauth2/access_token', 'client_id': 'bridge',
+                'access_token': 'expired', 'expires_at': NOW + 10,
+            }, f)
+        self.assertEqual(self.provider(cache_file=self.cache_file).get(), 'token-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
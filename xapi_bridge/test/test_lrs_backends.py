@@ -0,0 +1,75 @@
+"""
+Тесты классификации ответов LRS бэкендами.
+
+"""
+
+import unittest
+
+from xapi_bridge import exceptions
+from xapi_bridge.lrs_backends import load_backend
+from xapi_bridge.lrs_backends.base import (
+    RESPONSE_ERROR, RESPONSE_OK, RESPONSE_SERVER_ERROR, RESPONSE_STORAGE_ERROR, RESPONSE_UNAUTHORISED
+)
+
+
+class LoadBackendTest(unittest.TestCase):
+
+    def test_loads_bundled_backend_by_module_name(self):
+        self.assertEqual(type(load_backend('generic')).__module__, 'xapi_bridge.lrs_backends.generic')
+
+    def test_loads_backend_by_dotted_path(self):
+        backend = load_backend('xapi_bridge.lrs_backends.learninglocker')
+        self.assertEqual(backend.supported_content_encodings, ('gzip', 'deflate'))
+
+    def test_unknown_backend_is_config_error(self):
+        with self.assertRaises(exceptions.XAPIBridgeConfigError):
+            load_backend('no_such_backend')
+
+
+class GenericBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = load_backend('generic')
+
+    def test_success(self):
+        self.assertEqual(self.backend.classify_response(200, ['id']), (RESPONSE_OK, None))
+
+    def test_auth_errors(self):
+        for status in (401, 403):
+            self.assertEqual(self.backend.classify_response(status, None), (RESPONSE_UNAUTHORISED, None))
+
+    def test_storage_errors_have_no_index(self):
+        for status in (400, 409, 413):
+            self.assertEqual(self.backend.classify_response(status, None), (RESPONSE_STORAGE_ERROR, None))
+
+    def test_server_errors_and_throttling_are_retried(self):
+        for status in (408, 429, 500, 503):
+            self.assertEqual(self.backend.classify_response(status, None), (RESPONSE_SERVER_ERROR, None))
+
+    def test_other_client_errors(self):
+        self.assertEqual(self.backend.classify_response(404, None), (RESPONSE_ERROR, None))
+
+
+class LearningLockerBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = load_backend('learninglocker')
+
+    def test_warning_maps_to_bad_statement_index(self):
+        response = {'warnings': ["Problem in 'statements.3.actor'. Received '{}'"]}
+        self.assertEqual(self.backend.classify_response(400, response), (RESPONSE_STORAGE_ERROR, 3))
+
+    def test_warning_without_index(self):
+        self.assertEqual(self.backend.classify_response(400, {'warnings': ['Bad']}), (RESPONSE_STORAGE_ERROR, None))
+
+    def test_unauthorised_message(self):
+        self.assertEqual(
+            self.backend.classify_response(200, {'message': 'Unauthorised'}), (RESPONSE_UNAUTHORISED, None)
+        )
+
+    def test_error_body_on_success_status(self):
+        self.assertEqual(self.backend.classify_response(200, {'errorId': 'x'}), (RESPONSE_ERROR, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
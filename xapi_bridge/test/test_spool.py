@@ -0,0 +1,115 @@
+"""
+Тесты спула: откладывания пакетов на диск и их выгрузки в LRS.
+
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+from unittest import mock
+
+from xapi_bridge import client, exceptions, settings
+from xapi_bridge.__main__ import QueueManager
+
+
+SPOOL_SETTINGS = {
+    'PUBLISH_ADAPTIVE': False,
+    'PUBLISH_MAX_PAYLOAD': 2,
+    'PUBLISH_MAX_WAIT_TIME': 0,
+    'PUBLISH_MAX_PAYLOAD_BYTES': 0,
+    'PUBLISH_SPOOL_MAX_PENDING': 2,
+}
+
+
+class BlockingPublisher:
+    """Публикатор, который принимает пакеты только после открытия."""
+
+    def __init__(self, error: Exception = None):
+        self.statements: List[bytes] = []
+        self.opened = threading.Event()
+        self.error = error
+
+    def publish_statements(self, statements: List[bytes]) -> None:
+        self.opened.wait(5)
+        if self.error:
+            raise self.error
+        self.statements.extend(statements)
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class SpoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        patchers = [mock.patch.object(settings, name, value, create=True) for name, value in SPOOL_SETTINGS.items()]
+        patchers.append(mock.patch.object(settings, 'PUBLISH_SPOOL_DIR', self.spool_dir, create=True))
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_queue(self, publisher: BlockingPublisher) -> QueueManager:
+        with mock.patch.dict(client.lrs_publishers, {client.DEFAULT_LRS_TARGET: publisher}):
+            queue = QueueManager()
+        # Закрытие ждет поток отправки, поэтому публикатор открывается раньше
+        self.addCleanup(queue.close)
+        self.addCleanup(publisher.opened.set)
+        return queue
+
+    def test_overflow_is_spilled_and_drained(self):
+        publisher = BlockingPublisher()
+        queue = self.create_queue(publisher)
+        statements = [b'{"id": "%d"}' % i for i in range(6)]
+        for statement in statements:
+            queue.push(statement)
+        self.assertTrue(os.path.exists(queue.spool_path))
+
+        publisher.opened.set()
+        self.assertTrue(wait_for(lambda: len(publisher.statements) == len(statements)))
+        self.assertCountEqual(publisher.statements, statements)
+        self.assertTrue(wait_for(lambda: not os.listdir(self.spool_dir)))
+
+    def test_drain_resumes_from_saved_offset(self):
+        draining_path = os.path.join(self.spool_dir, f'{client.DEFAULT_LRS_TARGET}-default.jsonl.draining')
+        with open(draining_path, 'wb') as spool:
+            spool.write(b'{"id": "sent"}\n{"id": "1"}\n{"id": "2"}\n')
+        with open(f'{draining_path}.offset', 'w') as offset:
+            offset.write(str(len(b'{"id": "sent"}\n')))
+
+        publisher = BlockingPublisher()
+        publisher.opened.set()
+        self.create_queue(publisher)
+
+        self.assertTrue(wait_for(lambda: not os.path.exists(draining_path)))
+        self.assertEqual(publisher.statements, [b'{"id": "1"}', b'{"id": "2"}'])
+
+    def test_unreachable_lrs_keeps_spool(self):
+        publisher = BlockingPublisher(exceptions.XAPIBridgeLRSConnectionError(endpoint='http://lrs/'))
+        publisher.opened.set()
+        queue = self.create_queue(publisher)
+        with open(queue.spool_path, 'wb') as spool:
+            spool.write(b'{"id": "1"}\n')
+        queue.wakeup.set()
+
+        self.assertTrue(wait_for(lambda: queue.spool_retry_at is not None))
+        draining_path = f'{queue.spool_path}.draining'
+        with open(draining_path, 'rb') as spool:
+            self.assertEqual(spool.read(), b'{"id": "1"}\n')
+        with open(f'{draining_path}.offset') as offset:
+            self.assertEqual(offset.read(), '0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Тесты проверки высказываний схемой xAPI и записи отклоненных в dead letter.
+
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tincan import Activity, Agent, AgentAccount, LanguageMap, Statement, Verb
+
+from xapi_bridge import constants, converter, validation
+
+
+def valid_statement():
+    """Высказывание в том виде, в каком его отправляет бридж."""
+    return Statement(
+        actor=Agent(account=AgentAccount(name='7', home_page='https://lms.example.org')),
+        verb=Verb(id=constants.XAPI_VERB_PLAYED, display=LanguageMap({'en-US': 'played'})),
+        object=Activity(id='https://lms.example.org/xblock/block-v1:Org+C+R+type@video+block@1'),
+        timestamp='2024-01-01T00:00:00+00:00',
+    )
+
+
+class StatementValidatorTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.dead_letter_file = os.path.join(tmp_dir, 'dead_letter.jsonl')
+        self.validator = validation.StatementValidator(self.dead_letter_file)
+
+    def read_dead_letter(self):
+        with open(self.dead_letter_file, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_bridge_statement_is_valid(self):
+        self.assertTrue(self.validator.is_valid(valid_statement().as_version(constants.XAPI_VERSION)))
+        self.assertFalse(os.path.exists(self.dead_letter_file))
+
+    def test_actor_needs_exactly_one_identifier(self):
+        statement = valid_statement().as_version(constants.XAPI_VERSION)
+        statement['actor']['mbox'] = 'mailto:learner@example.org'
+        self.assertFalse(self.validator.is_valid(statement))
+
+    def test_rejected_statement_goes_to_dead_letter(self):
+        statement = valid_statement().as_version(constants.XAPI_VERSION)
+        statement['object']['id'] = 'not an iri'
+
+        self.assertFalse(self.validator.is_valid(statement))
+        self.assertEqual(self.validator.rejected, 1)
+        [record] = self.read_dead_letter()
+        self.assertEqual(record['statement'], statement)
+        self.assertIn('object', record['reason'])
+        self.assertIn('time', record)
+
+    def test_rejected_statement_is_not_serialized(self):
+        statement = valid_statement()
+        statement.verb.id = 'played'
+        with mock.patch.object(validation, 'statement_validator', self.validator):
+            self.assertIsNone(converter.serialize_statement(statement))
+            payloads = converter.serialize_statements([statement, valid_statement()])
+        self.assertEqual(payloads, [converter.serialize_statement(valid_statement())])
+        self.assertEqual(len(self.read_dead_letter()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Тесты агрегации событий просмотра видео в сессии.
+
+"""
+
+import json
+import unittest
+from unittest import mock
+
+from xapi_bridge import settings
+from xapi_bridge.video_sessions import VideoSessionAggregator, compact_segments
+
+
+def video_event(event_type, **data):
+    """Событие плеера видео из браузера."""
+    return {
+        'event_type': event_type,
+        'event_source': 'browser',
+        'username': 'learner',
+        'time': '2024-01-01T00:00:00+00:00',
+        'referer': 'https://lms.example.org/courses/course-v1:Org+C+R/courseware',
+        'event': json.dumps(dict(data, id='video-1', duration=1000)),
+        'context': {
+            'course_id': 'course-v1:Org+C+R',
+            'user_id': 7,
+            'module': {'display_name': 'Video', 'usage_key': 'block-v1:Org+C+R+type@video+block@video-1'},
+        },
+    }
+
+
+class CompactSegmentsTest(unittest.TestCase):
+
+    def test_overlapping_segments_are_merged(self):
+        self.assertEqual(compact_segments([(5, 10), (0, 6), (20, 30)], 10), [(0.0, 10.0), (20.0, 30.0)])
+
+    def test_closest_disjoint_segments_are_joined_down_to_limit(self):
+        segments = [(0, 1), (2, 3), (10, 11), (30, 31)]
+        self.assertEqual(compact_segments(segments, 2), [(0.0, 11.0), (30.0, 31.0)])
+
+
+class VideoSessionAggregatorTest(unittest.TestCase):
+
+    def test_disjoint_segments_stay_within_cap(self):
+        aggregator = VideoSessionAggregator(idle_timeout=300, max_sessions=10)
+        for i in range(500):
+            aggregator.add(video_event('play_video', currentTime=i * 2))
+            aggregator.add(video_event('pause_video', currentTime=i * 2 + 1))
+
+        session = next(iter(aggregator.sessions.values()))
+        self.assertLessEqual(len(session.segments), VideoSessionAggregator.MAX_SEGMENTS)
+        self.assertEqual(session.segments[0][0], 0.0)
+        self.assertEqual(session.segments[-1][1], 999.0)
+
+    # Высказывание сессии строится из данных события, без запросов к LMS
+    @mock.patch.object(settings, 'XAPI_COURSE_FROM_EVENT', True, create=True)
+    @mock.patch.object(settings, 'XAPI_ACTOR_IDENTITY', 'account', create=True)
+    def test_stop_video_closes_session(self):
+        aggregator = VideoSessionAggregator(idle_timeout=300, max_sessions=10)
+        aggregator.add(video_event('play_video', currentTime=0))
+        closed = aggregator.add(video_event('stop_video', currentTime=100))
+
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(aggregator.sessions, {})
+        self.assertEqual(closed[0][0]['event_type'], 'stop_video')
+        self.assertEqual(closed[0][1].actor.account.name, '7')
+
+
+if __name__ == '__main__':
+    unittest.main()
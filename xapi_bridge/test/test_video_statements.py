@@ -0,0 +1,52 @@
+"""
+Тесты объединения просмотренных фрагментов видео и расчета прогресса.
+
+"""
+
+import unittest
+
+from xapi_bridge.statements.video import (
+    format_played_segments, get_progress, merge_segment_array, merge_segments
+)
+
+
+class MergeSegmentsTest(unittest.TestCase):
+
+    def test_overlapping_and_touching_segments_are_merged(self):
+        segments = [(30, 40), (0, 10), (5, 12), (12, 20)]
+        self.assertEqual(merge_segments(segments), [(0.0, 20.0), (30.0, 40.0)])
+
+    def test_nested_segment_does_not_shorten_group(self):
+        self.assertEqual(merge_segments([(0, 100), (10, 20), (50, 60)]), [(0.0, 100.0)])
+
+    def test_flat_list_is_accepted(self):
+        self.assertEqual(merge_segment_array([0, 5, 3, 8]).tolist(), [[0.0, 8.0]])
+
+    def test_segments_are_clipped_to_length(self):
+        segments = merge_segment_array([(-5, 10), (90, 120), (150, 160)], 100)
+        self.assertEqual(segments.tolist(), [[0.0, 10.0], [90.0, 100.0]])
+
+    def test_empty_and_reversed_segments_are_dropped(self):
+        self.assertEqual(merge_segments([(10, 10), (20, 15)]), [])
+        self.assertEqual(merge_segments([]), [])
+
+    def test_played_segments_format(self):
+        self.assertEqual(format_played_segments([(0, 1.5), (3, 4)]), '0.000[.]1.500[,]3.000[.]4.000')
+
+
+class ProgressTest(unittest.TestCase):
+
+    def test_share_of_merged_segments(self):
+        segments = merge_segment_array([(0, 30), (20, 50)], 200)
+        self.assertEqual(get_progress(segments, 200), 0.25)
+
+    def test_progress_is_capped(self):
+        self.assertEqual(get_progress([(0, 120)], 100), 1.0)
+
+    def test_no_length_or_segments(self):
+        self.assertEqual(get_progress([(0, 10)], 0), 0.0)
+        self.assertEqual(get_progress([], 100), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
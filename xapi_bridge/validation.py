@@ -0,0 +1,225 @@
+"""
+Проверка xAPI-высказываний перед отправкой в LRS.
+
+Высказывания проверяются скомпилированной (fastjsonschema) схемой xAPI 1.0.3
+сразу после сериализации, до попадания в пакет. Невалидные высказывания
+записываются в файл недоставленных (dead letter) и не отправляются, поэтому
+LRS не отклоняет пакеты целиком из-за одного высказывания.
+
+"""
+
+import datetime
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from xapi_bridge import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Схема xAPI 1.0.3 в объеме, достаточном для высказываний бриджа
+_IRI = {'type': 'string', 'pattern': r'^[A-Za-z][A-Za-z0-9+.\-]*:\S+$'}
+_UUID = {'type': 'string', 'pattern': r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'}
+_TIMESTAMP = {'type': 'string', 'pattern': r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$'}
+_LANGUAGE_MAP = {'type': 'object', 'additionalProperties': {'type': 'string'}}
+_EXTENSIONS = {'type': 'object', 'propertyNames': _IRI}
+
+_AGENT = {
+    'type': 'object',
+    'properties': {
+        'objectType': {'enum': ['Agent']},
+        'name': {'type': 'string'},
+        'mbox': {'type': 'string', 'pattern': r'^mailto:[^@\s]+@\S+$'},
+        'mbox_sha1sum': {'type': 'string', 'pattern': r'^[0-9a-f]{40}$'},
+        'openid': _IRI,
+        'account': {
+            'type': 'object',
+            'required': ['homePage', 'name'],
+            'properties': {'homePage': _IRI, 'name': {'type': 'string', 'minLength': 1}},
+        },
+    },
+    # Ровно один обратный функциональный идентификатор (IFI)
+    'oneOf': [
+        {'required': ['mbox']},
+        {'required': ['mbox_sha1sum']},
+        {'required': ['openid']},
+        {'required': ['account']},
+    ],
+}
+_GROUP = {
+    'type': 'object',
+    'required': ['objectType'],
+    'properties': {
+        'objectType': {'enum': ['Group']},
+        'name': {'type': 'string'},
+        'member': {'type': 'array', 'items': _AGENT},
+    },
+}
+_ACTOR = {'anyOf': [_AGENT, _GROUP]}
+
+_ACTIVITY = {
+    'type': 'object',
+    'required': ['id'],
+    'properties': {
+        'objectType': {'enum': ['Activity']},
+        'id': _IRI,
+        'definition': {
+            'type': 'object',
+            'properties': {
+                'name': _LANGUAGE_MAP,
+                'description': _LANGUAGE_MAP,
+                'type': _IRI,
+                'moreInfo': _IRI,
+                'extensions': _EXTENSIONS,
+            },
+        },
+    },
+}
+_ACTIVITY_LIST = {'anyOf': [_ACTIVITY, {'type': 'array', 'items': _ACTIVITY}]}
+
+_STATEMENT_REF = {
+    'type': 'object',
+    'required': ['objectType', 'id'],
+    'properties': {'objectType': {'enum': ['StatementRef']}, 'id': _UUID},
+}
+
+_VERB = {
+    'type': 'object',
+    'required': ['id'],
+    'properties': {'id': _IRI, 'display': _LANGUAGE_MAP},
+}
+
+_RESULT = {
+    'type': 'object',
+    'properties': {
+        'score': {
+            'type': 'object',
+            'properties': {
+                'scaled': {'type': 'number', 'minimum': -1, 'maximum': 1},
+                'raw': {'type': 'number'},
+                'min': {'type': 'number'},
+                'max': {'type': 'number'},
+            },
+        },
+        'success': {'type': 'boolean'},
+        'completion': {'type': 'boolean'},
+        'response': {'type': 'string'},
+        'duration': {'type': 'string', 'pattern': r'^P'},
+        'extensions': _EXTENSIONS,
+    },
+}
+
+_CONTEXT = {
+    'type': 'object',
+    'properties': {
+        'registration': _UUID,
+        'instructor': _ACTOR,
+        'team': _GROUP,
+        'contextActivities': {
+            'type': 'object',
+            'propertyNames': {'enum': ['parent', 'grouping', 'category', 'other']},
+            'additionalProperties': _ACTIVITY_LIST,
+        },
+        'revision': {'type': 'string'},
+        'platform': {'type': 'string'},
+        'language': {'type': 'string'},
+        'statement': _STATEMENT_REF,
+        'extensions': _EXTENSIONS,
+    },
+}
+
+STATEMENT_SCHEMA: Dict[str, Any] = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'type': 'object',
+    'required': ['actor', 'verb', 'object'],
+    'properties': {
+        'id': _UUID,
+        'actor': _ACTOR,
+        'verb': _VERB,
+        'object': {
+            'anyOf': [
+                _ACTIVITY,
+                _STATEMENT_REF,
+                {'allOf': [_AGENT, {'required': ['objectType']}]},
+                _GROUP,
+                {
+                    'type': 'object',
+                    'required': ['objectType', 'actor', 'verb', 'object'],
+                    'properties': {'objectType': {'enum': ['SubStatement']}},
+                },
+            ],
+        },
+        'result': _RESULT,
+        'context': _CONTEXT,
+        'timestamp': _TIMESTAMP,
+        'stored': _TIMESTAMP,
+        'authority': _ACTOR,
+        'version': {'type': 'string', 'pattern': r'^1\.0(\.\d+)?$'},
+        'attachments': {'type': 'array'},
+    },
+}
+
+
+class StatementValidator:
+    """Проверка высказываний скомпилированной схемой с записью отклоненных в dead letter."""
+
+    def __init__(self, dead_letter_file: Optional[str] = None):
+        """
+        Args:
+            dead_letter_file: JSONL-файл для невалидных высказываний (None - только лог)
+        """
+        import fastjsonschema
+
+        self.validate = fastjsonschema.compile(STATEMENT_SCHEMA)
+        self.exception_class = fastjsonschema.JsonSchemaException
+        self.dead_letter_file = dead_letter_file
+        self.dead_letter_lock = threading.Lock()
+        self.rejected = 0
+
+    def is_valid(self, statement: Dict[str, Any]) -> bool:
+        """
+        Проверяет высказывание в виде словаря xAPI.
+
+        Невалидное высказывание записывается в dead letter вместе с причиной.
+        """
+        try:
+            self.validate(statement)
+            return True
+        except self.exception_class as e:
+            self.rejected += 1
+            logger.warning(f"Высказывание не прошло проверку схемы xAPI: {e.message}")
+            self._dead_letter(statement, e.message)
+            return False
+
+    def _dead_letter(self, statement: Dict[str, Any], reason: str) -> None:
+        """Запись отклоненного высказывания в файл недоставленных."""
+        if not self.dead_letter_file:
+            return
+        record = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'reason': reason,
+            'statement': statement,
+        }
+        try:
+            with self.dead_letter_lock, open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            logger.error(f"Ошибка записи в {self.dead_letter_file}: {e}")
+
+
+def _create_validator() -> Optional[StatementValidator]:
+    """Создает валидатор, если проверка включена настройкой STATEMENT_VALIDATION."""
+    if not getattr(settings, 'STATEMENT_VALIDATION', False):
+        return None
+    try:
+        return StatementValidator(getattr(settings, 'STATEMENT_DEAD_LETTER_FILE', None))
+    except ImportError:
+        logger.warning("fastjsonschema не установлен, проверка высказываний отключена")
+        return None
+
+
+# Валидатор по умолчанию (None, если проверка отключена)
+statement_validator = _create_validator()
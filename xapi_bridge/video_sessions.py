@@ -0,0 +1,185 @@
+"""
+Агрегация событий просмотра видео в итоговые высказывания по сессиям.
+
+Один слушатель, перематывающий видео, порождает десятки событий
+pause_video/stop_video. Вместо отдельного высказывания на каждое событие
+агрегатор накапливает просмотренные отрезки по паре (пользователь, видео)
+и отправляет одно высказывание на сессию с расширениями played-segments
+и progress из xAPI Video Profile.
+
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from xapi_bridge import exceptions, settings
+from xapi_bridge.statements import video
+
+
+logger = logging.getLogger(__name__)
+
+
+# Итоговое высказывание сессии вместе с событием, по которому оно построено
+SessionStatement = Tuple[Dict[str, Any], video.VideoSessionStatement]
+
+# События видео, которые принимает агрегатор
+VIDEO_SESSION_EVENT_TYPES = ('play_video', 'pause_video', 'seek_video', 'stop_video')
+
+
+def compact_segments(segments: List[Tuple[float, float]], limit: int) -> List[Tuple[float, float]]:
+    """
+    Объединяет отрезки и сокращает их количество до limit.
+
+    Непересекающиеся отрезки (например, после множества перемоток) при
+    объединении не сокращаются, поэтому склеиваются соседние отрезки с
+    наименьшим промежутком между ними. Промежуток при этом считается
+    просмотренным, зато память сессии и стоимость события ограничены.
+    Сокращение до limit, меньшего MAX_SEGMENTS, дает запас отрезков до
+    следующего сокращения.
+    """
+    merged = video.merge_segments(segments)
+    while len(merged) > limit:
+        gap_index = min(range(len(merged) - 1), key=lambda i: merged[i + 1][0] - merged[i][1])
+        merged[gap_index:gap_index + 2] = [(merged[gap_index][0], merged[gap_index + 1][1])]
+    return merged
+
+
+class VideoSession:
+    """Накопленное состояние просмотра одного видео одним пользователем."""
+
+    __slots__ = ('segments', 'position', 'segment_start', 'last_event', 'last_seen')
+
+    def __init__(self):
+        self.segments: List[Tuple[float, float]] = []
+        self.position = 0.0  # Последняя известная позиция воспроизведения
+        self.segment_start: Optional[float] = None  # Начало текущего отрезка, если видео воспроизводится
+        self.last_event: Optional[Dict[str, Any]] = None  # Последнее событие pause_video/stop_video
+        self.last_seen = 0.0
+
+
+class VideoSessionAggregator:
+    """Объединяет события просмотра видео в сессии с ограниченным состоянием."""
+
+    # Предел количества отрезков сессии: при превышении отрезки объединяются,
+    # а если их все равно больше COMPACT_SEGMENTS, склеиваются ближайшие соседние
+    MAX_SEGMENTS = 64
+    COMPACT_SEGMENTS = MAX_SEGMENTS // 2
+
+    def __init__(self, idle_timeout: Optional[float] = None, max_sessions: Optional[int] = None):
+        """
+        Args:
+            idle_timeout: Время бездействия (сек), после которого сессия закрывается
+            max_sessions: Максимальное количество одновременно открытых сессий
+        """
+        self.idle_timeout = idle_timeout or getattr(settings, 'VIDEO_SESSION_IDLE_TIMEOUT', 300)
+        self.max_sessions = max_sessions or getattr(settings, 'VIDEO_SESSION_MAX_SESSIONS', 10000)
+        self.sessions: 'OrderedDict[Tuple[str, str, str], VideoSession]' = OrderedDict()
+
+    @staticmethod
+    def event_type(evt: Dict[str, Any]) -> str:
+        return evt.get('event_type', '').replace('xblock-video.', '').strip()
+
+    def accepts(self, evt: Dict[str, Any]) -> bool:
+        """Проверяет, относится ли событие к просмотру видео в браузере."""
+        event_type = self.event_type(evt)
+        return (
+            evt.get('event_source') == 'browser'
+            and event_type in VIDEO_SESSION_EVENT_TYPES
+            and event_type not in settings.IGNORED_EVENT_TYPES
+        )
+
+    def add(self, evt: Dict[str, Any]) -> List[SessionStatement]:
+        """
+        Учитывает событие в сессии просмотра.
+
+        Returns:
+            Высказывания сессий, закрытых этим событием (stop_video или вытеснение),
+            вместе с их последними событиями
+        """
+        try:
+            event_data = json.loads(evt.get('event') or '{}')
+            key = (evt['username'], evt['context']['course_id'], event_data['id'])
+        except (KeyError, TypeError, json.JSONDecodeError) as e:
+            logger.debug(f"Событие видео без идентификатора сессии пропущено: {e}")
+            return []
+
+        session = self.sessions.pop(key, None) or VideoSession()
+        session.last_seen = time.monotonic()
+        self._apply(session, self.event_type(evt), event_data, evt)
+
+        closed = []
+        if self.event_type(evt) == 'stop_video':
+            closed.append(session)
+        else:
+            self.sessions[key] = session
+            while len(self.sessions) > self.max_sessions:
+                closed.append(self.sessions.popitem(last=False)[1])
+
+        return self._to_statements(closed)
+
+    def flush_idle(self) -> List[SessionStatement]:
+        """Закрывает сессии, в которых не было событий дольше idle_timeout."""
+        deadline = time.monotonic() - self.idle_timeout
+        closed = []
+        # Сессии упорядочены по времени последнего события
+        while self.sessions:
+            key, session = next(iter(self.sessions.items()))
+            if session.last_seen > deadline:
+                break
+            closed.append(self.sessions.pop(key))
+        return self._to_statements(closed)
+
+    def flush_all(self) -> List[SessionStatement]:
+        """Закрывает все открытые сессии."""
+        closed = list(self.sessions.values())
+        self.sessions.clear()
+        return self._to_statements(closed)
+
+    def _apply(self, session: VideoSession, event_type: str, event_data: Dict[str, Any], evt: Dict[str, Any]) -> None:
+        """Обновляет отрезки просмотра по событию плеера."""
+        if event_type == 'seek_video':
+            old_time = float(event_data.get('old_time') or 0)
+            new_time = float(event_data.get('new_time') or 0)
+            if session.segment_start is not None:
+                self._add_segment(session, session.segment_start, old_time)
+                session.segment_start = new_time
+            session.position = new_time
+            return
+
+        current_time = float(event_data.get('currentTime', event_data.get('current_time')) or 0)
+        if event_type == 'play_video':
+            if session.segment_start is None:
+                session.segment_start = current_time
+            return
+
+        # pause_video/stop_video: без события play отрезок начинается с последней известной позиции
+        start = session.segment_start if session.segment_start is not None else session.position
+        self._add_segment(session, start, current_time)
+        session.segment_start = None
+        session.position = current_time
+        session.last_event = evt
+
+    def _add_segment(self, session: VideoSession, start: float, end: float) -> None:
+        """Добавляет отрезок, не давая их количеству превысить MAX_SEGMENTS."""
+        session.segments.append((start, end))
+        if len(session.segments) > self.MAX_SEGMENTS:
+            session.segments = compact_segments(session.segments, self.COMPACT_SEGMENTS)
+
+    def _to_statements(self, sessions: List[VideoSession]) -> List[SessionStatement]:
+        """Строит итоговые высказывания закрытых сессий."""
+        statements = []
+        for session in sessions:
+            # Сессии только из play/seek не порождают высказываний, как и раньше
+            if session.last_event is None:
+                continue
+            try:
+                summary_event = dict(session.last_event, video_session_segments=session.segments)
+                statements.append((session.last_event, video.VideoSessionStatement(summary_event)))
+            except exceptions.XAPIBridgeSkippedConversion as e:
+                logger.debug(f"Сессия просмотра пропущена: {e.message}")
+            except Exception as e:
+                logger.error(f"Ошибка построения высказывания сессии просмотра: {e}")
+        return statements